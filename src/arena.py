@@ -0,0 +1,295 @@
+import marshal
+from array import array
+from enum import IntEnum, auto
+from typing import Dict, List, Tuple
+from expr import Assign, Binary, Grouping, Literal, Logical, Unary, Variable
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from _token import Token
+from token_buffer import TYPE_CODES
+from token_type import TokenType as T
+
+_TYPES = list(T)
+
+
+class Kind(IntEnum):
+    # Expressions
+    LITERAL = auto()
+    GROUPING = auto()
+    NEGATE = auto()
+    NOT = auto()
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    AND = auto()
+    OR = auto()
+    VARIABLE = auto()
+    ASSIGN = auto()
+
+    # Statements
+    EXPRESSION = auto()
+    PRINT = auto()
+    VAR = auto()
+    BLOCK = auto()
+    IF = auto()
+    WHILE = auto()
+
+
+BINARY_KINDS = {
+    T.PLUS: Kind.ADD,
+    T.MINUS: Kind.SUBTRACT,
+    T.STAR: Kind.MULTIPLY,
+    T.SLASH: Kind.DIVIDE,
+    T.GREATER: Kind.GREATER,
+    T.GREATER_EQUAL: Kind.GREATER_EQUAL,
+    T.LESS: Kind.LESS,
+    T.LESS_EQUAL: Kind.LESS_EQUAL,
+    T.EQUAL_EQUAL: Kind.EQUAL,
+    T.BANG_EQUAL: Kind.NOT_EQUAL,
+    T.AND: Kind.AND,
+    T.OR: Kind.OR,
+}
+
+NONE = -1
+
+
+class AstArena:
+    """
+    Flat AST. Node `i` is `kinds[i]` plus up to four integer fields `a[i]`,
+    `b[i]`, `c[i]`, `d[i]` in typed arrays; absent children are `NONE`.
+
+        LITERAL              a = constant
+        GROUPING             a = expression
+        NEGATE, NOT          a = operand,                     c = token
+        binary and logical   a = left, b = right,             c = token
+        VARIABLE                       b = depth, d = slot,   c = token
+        ASSIGN               a = value, b = depth, d = slot,  c = token
+        EXPRESSION, PRINT    a = expression
+        VAR                  a = initializer, b = 1 if local, c = token,
+                             d = slot
+        BLOCK                a = first child, b = child count
+        IF                   a = condition, b = then, c = else
+        WHILE                a = condition, b = body
+
+    `constant` and `token` index `constants` and `tokens`; a block's
+    statements are `children[a:a + b]`. Variables a `Resolver` found to be
+    local have their depth and slot baked in; globals have depth `NONE`.
+    The top-level statements are `children[root:root + root_count]`.
+    """
+
+    def __init__(self) -> None:
+        self.kinds = array('B')
+        self.a = array('i')
+        self.b = array('i')
+        self.c = array('i')
+        self.d = array('i')
+        self.children = array('i')
+        self.constants: List[object] = []
+        self.tokens: List[Token] = []
+        self.root = 0
+        self.root_count = 0
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def add(self, kind: Kind, a: int = NONE, b: int = NONE, c: int = NONE, d: int = NONE) -> int:
+        self.kinds.append(kind)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        self.d.append(d)
+        return len(self.kinds) - 1
+
+    def add_children(self, nodes: List[int]) -> int:
+        start = len(self.children)
+        self.children.extend(nodes)
+        return start
+
+    def add_constant(self, value: object) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def add_token(self, token: Token) -> int:
+        self.tokens.append(token)
+        return len(self.tokens) - 1
+
+    def statements(self) -> List[int]:
+        return list(self.children[self.root:self.root + self.root_count])
+
+    def nbytes(self) -> int:
+        """Memory used by the node and child arrays."""
+        return sum(column.itemsize * len(column) for column in
+                   (self.kinds, self.a, self.b, self.c, self.d, self.children))
+
+    def to_bytes(self) -> bytes:
+        """Serializes the arena: the raw arrays plus marshalled tables."""
+        tokens = [(TYPE_CODES[token.type], token.lexeme, token.literal, token.line)
+                  for token in self.tokens]
+        return marshal.dumps((
+            self.kinds.tobytes(), self.a.tobytes(), self.b.tobytes(),
+            self.c.tobytes(), self.d.tobytes(), self.children.tobytes(),
+            self.constants, tokens, self.root, self.root_count,
+        ))
+
+    @staticmethod
+    def from_bytes(data: bytes) -> "AstArena":
+        (kinds, a, b, c, d, children, constants, tokens,
+         root, root_count) = marshal.loads(data)
+        arena = AstArena()
+        for column, raw in ((arena.kinds, kinds), (arena.a, a), (arena.b, b),
+                            (arena.c, c), (arena.d, d), (arena.children, children)):
+            column.frombytes(raw)
+        arena.constants = constants
+        arena.tokens = [Token(_TYPES[type], lexeme, literal, line)
+                        for type, lexeme, literal, line in tokens]
+        arena.root = root
+        arena.root_count = root_count
+        return arena
+
+
+class ArenaBuilder:
+    """Flattens a dataclass syntax tree into an `AstArena`."""
+
+    def __init__(self, locals: Dict[Token, Tuple[int, int]] = None) -> None:
+        self._arena = AstArena()
+        self._locals = locals if locals is not None else {}
+
+    def build(self, statements: List[Stmt]) -> AstArena:
+        roots = [self._add(statement) for statement in statements]
+        self._arena.root = self._arena.add_children(roots)
+        self._arena.root_count = len(roots)
+        return self._arena
+
+    def _add(self, node) -> int:
+        return node.accept(self)
+
+    def _add_optional(self, node) -> int:
+        return NONE if node is None else self._add(node)
+
+    def _location(self, name: Token) -> Tuple[int, int]:
+        return self._locals.get(name, (NONE, NONE))
+
+    def visit_literal_expr(self, expr: Literal):
+        return self._arena.add(Kind.LITERAL, self._arena.add_constant(expr.value))
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return self._arena.add(Kind.GROUPING, self._add(expr.expression))
+
+    def visit_unary_expr(self, expr: Unary):
+        kind = Kind.NEGATE if expr.operator.type == T.MINUS else Kind.NOT
+        operand = self._add(expr.right)
+        return self._arena.add(kind, operand, c=self._arena.add_token(expr.operator))
+
+    def visit_binary_expr(self, expr: Binary):
+        left = self._add(expr.left)
+        right = self._add(expr.right)
+        return self._arena.add(BINARY_KINDS[expr.operator.type], left, right,
+                               self._arena.add_token(expr.operator))
+
+    def visit_logical_expr(self, expr: Logical):
+        return self.visit_binary_expr(expr)
+
+    def visit_variable_expr(self, expr: Variable):
+        depth, slot = self._location(expr.name)
+        return self._arena.add(Kind.VARIABLE, b=depth, c=self._arena.add_token(expr.name), d=slot)
+
+    def visit_assign_expr(self, expr: Assign):
+        value = self._add(expr.value)
+        depth, slot = self._location(expr.name)
+        return self._arena.add(Kind.ASSIGN, value, depth,
+                               self._arena.add_token(expr.name), slot)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        return self._arena.add(Kind.EXPRESSION, self._add(stmt.expression))
+
+    def visit_print_stmt(self, stmt: Print):
+        return self._arena.add(Kind.PRINT, self._add(stmt.expression))
+
+    def visit_var_stmt(self, stmt: Var):
+        initializer = self._add_optional(stmt.initializer)
+        local = 1 if stmt.name in self._locals else 0
+        slot = self._location(stmt.name)[1]
+        return self._arena.add(Kind.VAR, initializer, local,
+                               self._arena.add_token(stmt.name), slot)
+
+    def visit_block_stmt(self, stmt: Block):
+        children = [self._add(statement) for statement in stmt.statements]
+        start = self._arena.add_children(children)
+        return self._arena.add(Kind.BLOCK, start, len(children))
+
+    def visit_if_stmt(self, stmt: If):
+        condition = self._add(stmt.condition)
+        then_branch = self._add(stmt.then_branch)
+        else_branch = self._add_optional(stmt.else_branch)
+        return self._arena.add(Kind.IF, condition, then_branch, else_branch)
+
+    def visit_while_stmt(self, stmt: While):
+        condition = self._add(stmt.condition)
+        body = self._add(stmt.body)
+        return self._arena.add(Kind.WHILE, condition, body)
+
+
+class ArenaReader:
+    """
+    Rebuilds the dataclass tree from an `AstArena`, handing the resolved
+    variable locations baked into it back to `interpreter.resolve`, as the
+    `Resolver` would have.
+    """
+
+    def __init__(self, interpreter) -> None:
+        self._interpreter = interpreter
+
+    def read(self, arena: AstArena) -> List[Stmt]:
+        self._arena = arena
+        return [self._node(node) for node in arena.statements()]
+
+    def _optional(self, node: int):
+        return None if node == NONE else self._node(node)
+
+    def _resolve(self, node: int, depth: int) -> Token:
+        name = self._arena.tokens[self._arena.c[node]]
+        if depth != NONE:
+            self._interpreter.resolve(name, depth, self._arena.d[node])
+        return name
+
+    def _node(self, node: int):
+        arena = self._arena
+        kind = arena.kinds[node]
+        a = arena.a[node]
+        b = arena.b[node]
+        c = arena.c[node]
+
+        match kind:
+            case Kind.LITERAL:
+                return Literal(arena.constants[a])
+            case Kind.GROUPING:
+                return Grouping(self._node(a))
+            case Kind.NEGATE | Kind.NOT:
+                return Unary(arena.tokens[c], self._node(a))
+            case Kind.AND | Kind.OR:
+                return Logical(self._node(a), arena.tokens[c], self._node(b))
+            case Kind.VARIABLE:
+                return Variable(self._resolve(node, b))
+            case Kind.ASSIGN:
+                value = self._node(a)
+                return Assign(self._resolve(node, b), value)
+            case Kind.EXPRESSION:
+                return Expression(self._node(a))
+            case Kind.PRINT:
+                return Print(self._node(a))
+            case Kind.VAR:
+                initializer = self._optional(a)
+                return Var(self._resolve(node, 0 if b else NONE), initializer)
+            case Kind.BLOCK:
+                return Block([self._node(child) for child in arena.children[a:a + b]])
+            case Kind.IF:
+                return If(self._node(a), self._node(b), self._optional(c))
+            case Kind.WHILE:
+                return While(self._node(a), self._node(b))
+        return Binary(self._node(a), arena.tokens[c], self._node(b))
@@ -0,0 +1,197 @@
+import operator
+from typing import Callable, Dict, List, Tuple
+from arena import NONE, ArenaBuilder, AstArena, Kind
+from context import RunContext
+from environment import LocalEnvironment
+from error import LoxRuntimeError
+from interpreter import check_number_operands
+from stmt import Stmt
+from _token import Token
+from utils.equality import is_equal
+from utils.rope import concat, is_string
+from utils.strings import stringify
+from utils.truthy import is_truthy
+
+_NUMBER_OPS = {
+    Kind.SUBTRACT: operator.sub,
+    Kind.MULTIPLY: operator.mul,
+    Kind.DIVIDE: operator.truediv,
+    Kind.GREATER: operator.gt,
+    Kind.GREATER_EQUAL: operator.ge,
+    Kind.LESS: operator.lt,
+    Kind.LESS_EQUAL: operator.le,
+}
+
+
+class ArenaInterpreter:
+    """
+    Tree-walking engine over an `AstArena` instead of the dataclass tree.
+    Dispatch is a list index on the node's kind, and variable locations are
+    read from the arena rather than looked up per access.
+    """
+
+    def __init__(self, context: RunContext | None = None) -> None:
+        self._context = context if context is not None else RunContext()
+        self._globals = self._context.globals
+        self._environment = self._globals
+        self._locals: Dict[Token, Tuple[int, int]] = {}
+        self._output = self._context.output
+
+        handlers: Dict[Kind, Callable[[int], object]] = {
+            Kind.LITERAL: self._literal,
+            Kind.GROUPING: self._grouping,
+            Kind.NEGATE: self._negate,
+            Kind.NOT: self._not,
+            Kind.ADD: self._add,
+            Kind.EQUAL: self._equal,
+            Kind.NOT_EQUAL: self._not_equal,
+            Kind.AND: self._and,
+            Kind.OR: self._or,
+            Kind.VARIABLE: self._variable,
+            Kind.ASSIGN: self._assign,
+            Kind.EXPRESSION: self._expression,
+            Kind.PRINT: self._print,
+            Kind.VAR: self._var,
+            Kind.BLOCK: self._block,
+            Kind.IF: self._if,
+            Kind.WHILE: self._while,
+        }
+        for kind in _NUMBER_OPS:
+            handlers[kind] = self._arithmetic
+        self._handlers: List[Callable[[int], object]] = [None] * (max(Kind) + 1)
+        for kind, handler in handlers.items():
+            self._handlers[kind] = handler
+
+    def resolve(self, name: Token, depth: int, slot: int):
+        self._locals[name] = (depth, slot)
+
+    def forget_locals(self):
+        self._locals.clear()
+
+    def prepare(self, statements: List[Stmt]) -> AstArena:
+        return ArenaBuilder(self._locals).build(statements)
+
+    def execute(self, arena: AstArena):
+        self.run(arena)
+
+    def interpret(self, statements: List[Stmt]):
+        self.run(self.prepare(statements))
+
+    def run(self, arena: AstArena):
+        self._kinds = arena.kinds
+        self._a = arena.a
+        self._b = arena.b
+        self._c = arena.c
+        self._d = arena.d
+        self._children = arena.children
+        self._constants = arena.constants
+        self._tokens = arena.tokens
+        try:
+            for node in arena.statements():
+                self._evaluate(node)
+        except LoxRuntimeError as err:
+            self._context.errors.runtime_error(err)
+
+    def _evaluate(self, node: int):
+        return self._handlers[self._kinds[node]](node)
+
+    def _literal(self, node: int):
+        return self._constants[self._a[node]]
+
+    def _grouping(self, node: int):
+        return self._evaluate(self._a[node])
+
+    def _negate(self, node: int):
+        right = self._evaluate(self._a[node])
+        if right.__class__ is not float:
+            check_number_operands(self._tokens[self._c[node]], right)
+        return -right
+
+    def _not(self, node: int):
+        return not is_truthy(self._evaluate(self._a[node]))
+
+    def _add(self, node: int):
+        left = self._evaluate(self._a[node])
+        right = self._evaluate(self._b[node])
+        if left.__class__ is float and right.__class__ is float:
+            return left + right
+        if is_string(left) and is_string(right):
+            return concat(left, right)
+        raise LoxRuntimeError(self._tokens[self._c[node]],
+                              "Operands must be two numbers or two strings.")
+
+    def _arithmetic(self, node: int):
+        left = self._evaluate(self._a[node])
+        right = self._evaluate(self._b[node])
+        if left.__class__ is not float or right.__class__ is not float:
+            check_number_operands(self._tokens[self._c[node]], left, right)
+        return _NUMBER_OPS[self._kinds[node]](left, right)
+
+    def _equal(self, node: int):
+        return is_equal(self._evaluate(self._a[node]), self._evaluate(self._b[node]))
+
+    def _not_equal(self, node: int):
+        return not is_equal(self._evaluate(self._a[node]), self._evaluate(self._b[node]))
+
+    def _and(self, node: int):
+        left = self._evaluate(self._a[node])
+        if not is_truthy(left):
+            return left
+        return self._evaluate(self._b[node])
+
+    def _or(self, node: int):
+        left = self._evaluate(self._a[node])
+        if is_truthy(left):
+            return left
+        return self._evaluate(self._b[node])
+
+    def _variable(self, node: int):
+        depth = self._b[node]
+        if depth == NONE:
+            return self._globals.get(self._tokens[self._c[node]])
+        return self._environment.get_at(depth, self._d[node])
+
+    def _assign(self, node: int):
+        value = self._evaluate(self._a[node])
+        depth = self._b[node]
+        if depth == NONE:
+            self._globals.assign(self._tokens[self._c[node]], value)
+        else:
+            self._environment.assign_at(depth, self._d[node], value)
+        return value
+
+    def _expression(self, node: int):
+        self._evaluate(self._a[node])
+
+    def _print(self, node: int):
+        self._output.write_line(stringify(self._evaluate(self._a[node])))
+
+    def _var(self, node: int):
+        initializer = self._a[node]
+        value = None if initializer == NONE else self._evaluate(initializer)
+        if self._b[node]:
+            self._environment.define(value)
+        else:
+            self._globals.define(self._tokens[self._c[node]].lexeme, value)
+
+    def _block(self, node: int):
+        start = self._a[node]
+        previous = self._environment
+        try:
+            self._environment = LocalEnvironment(previous)
+            for child in self._children[start:start + self._b[node]]:
+                self._evaluate(child)
+        finally:
+            self._environment = previous
+
+    def _if(self, node: int):
+        if is_truthy(self._evaluate(self._a[node])):
+            self._evaluate(self._b[node])
+        elif self._c[node] != NONE:
+            self._evaluate(self._c[node])
+
+    def _while(self, node: int):
+        condition = self._a[node]
+        body = self._b[node]
+        while is_truthy(self._evaluate(condition)):
+            self._evaluate(body)
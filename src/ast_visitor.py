@@ -1,5 +1,4 @@
 from typing import List
-from decorators.visitor import visitor
 from expr import Binary, Expr, Grouping, Literal, Unary
 
 
@@ -14,20 +13,16 @@ def _parenthesize(name: str, *exprs: Expr):
 
 
 class AstVisitor(object):
-    @visitor(Binary)
-    def visit(self, expr: Binary):
+    def visit_binary_expr(self, expr: Binary):
         return _parenthesize(expr.operator.lexeme, expr.left, expr.right)
 
-    @visitor(Grouping)
-    def visit(self, expr: Grouping):
+    def visit_grouping_expr(self, expr: Grouping):
         return _parenthesize("group", expr.expression)
 
-    @visitor(Literal)
-    def visit(self, expr: Literal):
+    def visit_literal_expr(self, expr: Literal):
         if expr.value == None:
             return "nil"
         return str(expr.value)
 
-    @visitor(Unary)
-    def visit(self, expr: Unary):
+    def visit_unary_expr(self, expr: Unary):
         return _parenthesize(expr.operator.lexeme, expr.right)
@@ -0,0 +1,100 @@
+import argparse
+import glob
+import io
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List
+from context import RunContext
+from output import OutputSink
+
+# Exit status for a script that could not be read (EX_NOINPUT, alongside the
+# 64/65/70 plox already uses).
+NO_INPUT = 66
+SOFTWARE_ERROR = 70
+
+
+def expand(pattern: str) -> List[str]:
+    """The scripts a `--batch` argument names: a directory's `.lox` files, or a glob."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "**", "*.lox")
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+class _ScriptTimeout(Exception):
+    """
+    Raised in a worker when a script runs past `--timeout`. Not the builtin
+    `TimeoutError`: that is an `OSError`, which the program cache swallows.
+    """
+
+
+def _on_alarm(signum, frame):
+    raise _ScriptTimeout()
+
+
+def run_script(path: str, args: argparse.Namespace) -> dict:
+    """
+    Runs one script in a worker process with its output captured, and
+    returns its result as a JSON-ready dict.
+    """
+    # Imported here: plox imports this module to dispatch --batch.
+    from plox import Plox
+
+    stream = io.StringIO()
+    context = RunContext(OutputSink(stream=stream))
+    result = {"script": path, "status": None, "timed_out": False}
+    timer = args.timeout is not None and hasattr(signal, "setitimer")
+    start = time.perf_counter()
+    try:
+        try:
+            if timer:
+                signal.signal(signal.SIGALRM, _on_alarm)
+                signal.setitimer(signal.ITIMER_REAL, args.timeout)
+            plox = Plox(args, context)
+            result["status"] = plox.execute_file(path)
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+        except _ScriptTimeout:
+            # The alarm can still land just after the script returned.
+            result["timed_out"] = result["status"] is None
+        except OSError as err:
+            result["status"] = NO_INPUT
+            result["error"] = str(err)
+        except Exception as err:
+            # Not a Lox error: a crash in plox itself, or e.g. a RecursionError.
+            result["status"] = SOFTWARE_ERROR
+            result["error"] = f"{type(err).__name__}: {err}"
+        finally:
+            if timer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except _ScriptTimeout:
+        # The alarm went off inside one of the handlers above.
+        result["timed_out"] = result["status"] is None
+    result["seconds"] = round(time.perf_counter() - start, 6)
+    # Only `execute_file` flushes on its own; keep what a timed out or
+    # crashed script printed.
+    context.output.flush()
+    result["stdout"] = stream.getvalue()
+    return result
+
+
+def run_batch(args: argparse.Namespace, out=sys.stdout) -> int:
+    """
+    Runs every script `args.batch` names across `args.jobs` worker
+    processes, writing one JSON line per script as each finishes. Workers
+    are reused from script to script. Returns 0 if every script exited
+    with 0, and 1 otherwise.
+    """
+    scripts = expand(args.batch)
+    failed = False
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(run_script, path, args) for path in scripts]
+        for future in as_completed(futures):
+            result = future.result()
+            failed = failed or result["status"] != 0
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    return 1 if failed else 0
@@ -0,0 +1,104 @@
+from enum import IntEnum, auto
+from typing import List
+from _token import Token
+
+
+class OpCode(IntEnum):
+    CONSTANT = auto()
+    NIL = auto()
+    TRUE = auto()
+    FALSE = auto()
+    POP = auto()
+    POP_N = auto()
+    GET_LOCAL = auto()
+    SET_LOCAL = auto()
+    GET_GLOBAL = auto()
+    DEFINE_GLOBAL = auto()
+    SET_GLOBAL = auto()
+    EQUAL = auto()
+    NOT_EQUAL = auto()
+    GREATER = auto()
+    GREATER_EQUAL = auto()
+    LESS = auto()
+    LESS_EQUAL = auto()
+    ADD = auto()
+    SUBTRACT = auto()
+    MULTIPLY = auto()
+    DIVIDE = auto()
+    NOT = auto()
+    NEGATE = auto()
+    PRINT = auto()
+    JUMP = auto()
+    JUMP_IF_FALSE = auto()
+    LOOP = auto()
+
+
+# Number of operands following each opcode in `Chunk.code`.
+OPERAND_COUNTS = {op: 0 for op in OpCode}
+OPERAND_COUNTS.update({
+    OpCode.CONSTANT: 1,
+    OpCode.POP_N: 1,
+    OpCode.GET_LOCAL: 1,
+    OpCode.SET_LOCAL: 1,
+    OpCode.GET_GLOBAL: 1,
+    OpCode.DEFINE_GLOBAL: 1,
+    OpCode.SET_GLOBAL: 1,
+    OpCode.GREATER: 1,
+    OpCode.GREATER_EQUAL: 1,
+    OpCode.LESS: 1,
+    OpCode.LESS_EQUAL: 1,
+    OpCode.ADD: 1,
+    OpCode.SUBTRACT: 1,
+    OpCode.MULTIPLY: 1,
+    OpCode.DIVIDE: 1,
+    OpCode.NEGATE: 1,
+    OpCode.JUMP: 1,
+    OpCode.JUMP_IF_FALSE: 1,
+    OpCode.LOOP: 1,
+})
+
+
+class Chunk:
+    """
+    A compiled program: a flat list of opcodes and their operands, plus the
+    constant pool and the tokens that runtime errors are reported against.
+
+    Opcodes that can fail at runtime (arithmetic, comparisons, global access)
+    take an index into `tokens` as their operand.
+    """
+
+    def __init__(self) -> None:
+        self.code: List[int] = []
+        self.constants: List[object] = []
+        self.tokens: List[Token] = []
+
+    def write(self, op: OpCode, *operands: int) -> int:
+        """Appends an instruction and returns its offset."""
+        offset = len(self.code)
+        self.code.append(int(op))
+        self.code.extend(operands)
+        return offset
+
+    def add_constant(self, value: object) -> int:
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def add_token(self, token: Token) -> int:
+        self.tokens.append(token)
+        return len(self.tokens) - 1
+
+    def disassemble(self) -> str:
+        lines: List[str] = []
+        offset = 0
+        while offset < len(self.code):
+            op = OpCode(self.code[offset])
+            count = OPERAND_COUNTS[op]
+            operands = self.code[offset + 1:offset + 1 + count]
+            text = f"{offset:04d} {op.name}"
+            if op == OpCode.CONSTANT:
+                text += f" {self.constants[operands[0]]!r}"
+            elif operands:
+                text += " " + " ".join(str(operand) for operand in operands)
+            lines.append(text)
+            offset += 1 + count
+        return "\n".join(lines)
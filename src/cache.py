@@ -0,0 +1,140 @@
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from arena import AstArena
+from version import VERSION
+
+# Bump whenever the arena layout or its serialization changes.
+FORMAT_VERSION = 1
+
+_MAGIC = b"PLOXC"
+_HEADER = _MAGIC + bytes([FORMAT_VERSION])
+_SUFFIX = ".ploxc"
+_TEMPORARY_SUFFIX = ".tmp"
+# Temporary files older than this were left by a writer that died.
+_STALE_TEMPORARY_SECONDS = 10 * 60
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def _default_directory() -> Path:
+    directory = os.environ.get("PLOX_CACHE_DIR")
+    if directory:
+        return Path(directory)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "plox"
+
+
+def _default_max_bytes() -> int:
+    try:
+        return int(os.environ["PLOX_CACHE_MAX_BYTES"])
+    except (KeyError, ValueError):
+        return DEFAULT_MAX_BYTES
+
+
+class ProgramCache:
+    """
+    On-disk cache of parsed, resolved (and optionally optimized) programs,
+    stored as serialized `AstArena`s. Entries are keyed by a hash of the
+    source, the plox version and the cache format, so a changed source or
+    an upgraded interpreter simply misses.
+
+    A hit bumps the entry's modification time; once the directory grows past
+    `max_bytes`, the least recently used entries are evicted. Unreadable or
+    corrupt entries are treated as misses and removed. The cache is only an
+    accelerator: any filesystem error leaves the program running uncached.
+    """
+
+    def __init__(self, directory: Path | None = None, max_bytes: int | None = None) -> None:
+        self.directory = directory if directory is not None else _default_directory()
+        self.max_bytes = max_bytes if max_bytes is not None else _default_max_bytes()
+
+    def key(self, source: str | bytes, optimize: bool) -> str:
+        """The key for `source`, given as text or as its UTF-8 bytes."""
+        digest = hashlib.sha256()
+        digest.update(f"{VERSION}\0{FORMAT_VERSION}\0{int(optimize)}\0".encode())
+        if isinstance(source, str):
+            source = source.encode("utf-8", "surrogatepass")
+        digest.update(source)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / (key + _SUFFIX)
+
+    def load(self, key: str) -> AstArena | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            if not data.startswith(_HEADER):
+                raise ValueError("stale or foreign cache entry")
+            arena = AstArena.from_bytes(data[len(_HEADER):])
+        except (ValueError, EOFError, TypeError, IndexError):
+            self._discard(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arena
+
+    def store(self, key: str, arena: AstArena):
+        path = self._path(key)
+        temporary = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename, so a concurrent reader never sees half a
+            # file. Every writer, thread or process, gets its own file.
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=_TEMPORARY_SUFFIX)
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(_HEADER + arena.to_bytes())
+            os.replace(temporary, path)
+            temporary = None
+        except (OSError, ValueError):
+            # ValueError: marshal could not serialize a constant.
+            return
+        finally:
+            # Also on exceptions that aren't caught here, such as a timeout.
+            if temporary is not None:
+                self._discard(Path(temporary))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache fits `max_bytes`,
+        and temporary files left behind by writers that never finished.
+        """
+        entries = []
+        total = 0
+        try:
+            stale = time.time() - _STALE_TEMPORARY_SECONDS
+            for path in self.directory.glob("*" + _TEMPORARY_SUFFIX):
+                if path.stat().st_mtime < stale:
+                    self._discard(path)
+            for path in self.directory.glob("*" + _SUFFIX):
+                stat = path.stat()
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        except OSError:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._discard(path)
+            total -= size
+
+    def clear(self):
+        for pattern in ("*" + _SUFFIX, "*" + _TEMPORARY_SUFFIX):
+            for path in self.directory.glob(pattern):
+                self._discard(path)
+
+    def _discard(self, path: Path):
+        try:
+            path.unlink()
+        except OSError:
+            pass
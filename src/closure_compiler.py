@@ -0,0 +1,267 @@
+import operator
+from typing import Callable, Dict, List, Tuple
+from context import RunContext
+from environment import LocalEnvironment
+from error import LoxRuntimeError
+from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
+from interpreter import check_number_operands
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from _token import Token
+from token_type import TokenType as T
+from utils.equality import is_equal
+from utils.rope import concat, is_string
+from utils.strings import stringify
+from utils.truthy import is_truthy
+
+# Compiled nodes take the current block environment. At the top level that
+# is the globals `Environment`, inside blocks a `LocalEnvironment`.
+Closure = Callable[[object], object]
+
+_NUMBER_OPS = {
+    T.GREATER: operator.gt,
+    T.GREATER_EQUAL: operator.ge,
+    T.LESS: operator.lt,
+    T.LESS_EQUAL: operator.le,
+    T.MINUS: operator.sub,
+    T.SLASH: operator.truediv,
+    T.STAR: operator.mul,
+}
+
+# Expressions that always produce a bool, so conditions built from them can
+# skip `is_truthy`.
+_BOOLEAN_OPS = {T.GREATER, T.GREATER_EQUAL, T.LESS, T.LESS_EQUAL,
+                T.BANG_EQUAL, T.EQUAL_EQUAL}
+
+
+def _is_boolean(expr: Expr) -> bool:
+    if isinstance(expr, Binary):
+        return expr.operator.type in _BOOLEAN_OPS
+    if isinstance(expr, Unary):
+        return expr.operator.type == T.BANG
+    if isinstance(expr, Grouping):
+        return _is_boolean(expr.expression)
+    return False
+
+
+class ClosureCompiler:
+    """
+    Alternate executor that turns every AST node into a Python closure once,
+    up front. Running the program is then direct closure calls, with no
+    `accept`/visitor dispatch per node. Semantics follow `Interpreter`.
+    """
+
+    def __init__(self, context: RunContext | None = None) -> None:
+        self._context = context if context is not None else RunContext()
+        self._globals = self._context.globals
+        self._locals: Dict[Token, Tuple[int, int]] = {}
+        self._output = self._context.output
+
+    def resolve(self, name: Token, depth: int, slot: int):
+        self._locals[name] = (depth, slot)
+
+    def forget_locals(self):
+        self._locals.clear()
+
+    def compile(self, statements: List[Stmt]) -> Closure:
+        compiled = [self._compile(statement) for statement in statements]
+
+        def run(env):
+            for statement in compiled:
+                statement(env)
+        return run
+
+    def prepare(self, statements: List[Stmt]) -> Tuple[List[Stmt], Dict[Token, Tuple[int, int]]]:
+        # The closures bind this engine's globals and output, so they are
+        # built per run in `execute`; only the resolution is carried over.
+        return statements, self._locals
+
+    def execute(self, prepared: Tuple[List[Stmt], Dict[Token, Tuple[int, int]]]):
+        statements, self._locals = prepared
+        program = self.compile(statements)
+        try:
+            program(self._globals)
+        except LoxRuntimeError as err:
+            self._context.errors.runtime_error(err)
+
+    def interpret(self, statements: List[Stmt]):
+        self.execute(self.prepare(statements))
+
+    def _compile(self, node) -> Closure:
+        return node.accept(self)
+
+    def _compile_condition(self, expr: Expr) -> Closure:
+        condition = self._compile(expr)
+        if _is_boolean(expr):
+            return condition
+        return lambda env: is_truthy(condition(env))
+
+    def visit_literal_expr(self, expr: Literal):
+        value = expr.value
+        return lambda env: value
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return self._compile(expr.expression)
+
+    def visit_unary_expr(self, expr: Unary):
+        right = self._compile(expr.right)
+        token = expr.operator
+
+        if token.type == T.BANG:
+            return lambda env: not is_truthy(right(env))
+
+        def negate(env):
+            value = right(env)
+            if value.__class__ is not float:
+                check_number_operands(token, value)
+            return -value
+        return negate
+
+    def visit_binary_expr(self, expr: Binary):
+        left = self._compile(expr.left)
+        right = self._compile(expr.right)
+        token = expr.operator
+
+        match token.type:
+            case T.EQUAL_EQUAL:
+                return lambda env: is_equal(left(env), right(env))
+            case T.BANG_EQUAL:
+                return lambda env: not is_equal(left(env), right(env))
+            case T.PLUS:
+                def add(env):
+                    a = left(env)
+                    b = right(env)
+                    if a.__class__ is float and b.__class__ is float:
+                        return a + b
+                    if is_string(a) and is_string(b):
+                        return concat(a, b)
+                    raise LoxRuntimeError(
+                        token, "Operands must be two numbers or two strings.")
+                return add
+
+        op = _NUMBER_OPS[token.type]
+
+        def arithmetic(env):
+            a = left(env)
+            b = right(env)
+            if a.__class__ is not float or b.__class__ is not float:
+                check_number_operands(token, a, b)
+            return op(a, b)
+        return arithmetic
+
+    def visit_logical_expr(self, expr: Logical):
+        left = self._compile(expr.left)
+        right = self._compile(expr.right)
+
+        if expr.operator.type == T.OR:
+            def logical_or(env):
+                value = left(env)
+                return value if is_truthy(value) else right(env)
+            return logical_or
+
+        def logical_and(env):
+            value = left(env)
+            return right(env) if is_truthy(value) else value
+        return logical_and
+
+    def visit_variable_expr(self, expr: Variable):
+        name = expr.name
+        location = self._locals.get(name)
+        if location is None:
+            get = self._globals.get
+            return lambda env: get(name)
+
+        depth, slot = location
+        if depth == 0:
+            return lambda env: env.values[slot]
+        if depth == 1:
+            return lambda env: env.enclosing.values[slot]
+        return lambda env: env.get_at(depth, slot)
+
+    def visit_assign_expr(self, expr: Assign):
+        name = expr.name
+        value = self._compile(expr.value)
+        location = self._locals.get(name)
+
+        if location is None:
+            assign = self._globals.assign
+
+            def assign_global(env):
+                result = value(env)
+                assign(name, result)
+                return result
+            return assign_global
+
+        depth, slot = location
+        if depth == 0:
+            def assign_local(env):
+                result = env.values[slot] = value(env)
+                return result
+            return assign_local
+
+        def assign_at(env):
+            result = value(env)
+            env.assign_at(depth, slot, result)
+            return result
+        return assign_at
+
+    def visit_expression_stmt(self, stmt: Expression):
+        return self._compile(stmt.expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        value = self._compile(stmt.expression)
+        write_line = self._output.write_line
+        return lambda env: write_line(stringify(value(env)))
+
+    def visit_var_stmt(self, stmt: Var):
+        initializer = None
+        if stmt.initializer is not None:
+            initializer = self._compile(stmt.initializer)
+
+        if stmt.name in self._locals:
+            if initializer is None:
+                return lambda env: env.define(None)
+            return lambda env: env.define(initializer(env))
+
+        define = self._globals.define
+        lexeme = stmt.name.lexeme
+        if initializer is None:
+            return lambda env: define(lexeme, None)
+        return lambda env: define(lexeme, initializer(env))
+
+    def visit_block_stmt(self, stmt: Block):
+        statements = [self._compile(statement)
+                      for statement in stmt.statements]
+
+        def block(env):
+            inner = LocalEnvironment(env)
+            for statement in statements:
+                statement(inner)
+        return block
+
+    def visit_if_stmt(self, stmt: If):
+        condition = self._compile_condition(stmt.condition)
+        then_branch = self._compile(stmt.then_branch)
+
+        if stmt.else_branch is None:
+            def if_then(env):
+                if condition(env):
+                    then_branch(env)
+            return if_then
+
+        else_branch = self._compile(stmt.else_branch)
+
+        def if_else(env):
+            if condition(env):
+                then_branch(env)
+            else:
+                else_branch(env)
+        return if_else
+
+    def visit_while_stmt(self, stmt: While):
+        condition = self._compile_condition(stmt.condition)
+        body = self._compile(stmt.body)
+
+        def loop(env):
+            while condition(env):
+                body(env)
+        return loop
@@ -0,0 +1,177 @@
+from typing import List
+from bytecode import Chunk, OpCode
+from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from _token import Token
+from token_type import TokenType as T
+
+_BINARY_OPS = {
+    T.GREATER: OpCode.GREATER,
+    T.GREATER_EQUAL: OpCode.GREATER_EQUAL,
+    T.LESS: OpCode.LESS,
+    T.LESS_EQUAL: OpCode.LESS_EQUAL,
+    T.MINUS: OpCode.SUBTRACT,
+    T.PLUS: OpCode.ADD,
+    T.SLASH: OpCode.DIVIDE,
+    T.STAR: OpCode.MULTIPLY,
+}
+
+
+class Compiler:
+    """
+    Compiles a resolved program into a `Chunk` for the `Vm`.
+
+    Locals live on the VM stack: a `var` inside a block leaves its
+    initializer's value on the stack, and that stack position becomes the
+    variable's slot until the block ends. Statements leave the stack as they
+    found it, so the slot of the n-th live local is always n.
+    """
+
+    def __init__(self) -> None:
+        self._chunk = Chunk()
+        self._locals: List[str] = []
+        self._scope_sizes: List[int] = []
+
+    def compile(self, statements: List[Stmt]) -> Chunk:
+        for statement in statements:
+            self._compile_stmt(statement)
+        return self._chunk
+
+    def _compile_stmt(self, stmt: Stmt):
+        stmt.accept(self)
+
+    def _compile_expr(self, expr: Expr):
+        expr.accept(self)
+
+    def _emit(self, op: OpCode, *operands: int) -> int:
+        return self._chunk.write(op, *operands)
+
+    def _emit_jump(self, op: OpCode) -> int:
+        # The target is patched once it is known.
+        return self._emit(op, -1)
+
+    def _patch_jump(self, offset: int):
+        self._chunk.code[offset + 1] = len(self._chunk.code)
+
+    def _token(self, token: Token) -> int:
+        return self._chunk.add_token(token)
+
+    def _resolve_local(self, name: Token) -> int:
+        for slot in range(len(self._locals) - 1, -1, -1):
+            if self._locals[slot] == name.lexeme:
+                return slot
+        return -1
+
+    def visit_literal_expr(self, expr: Literal):
+        if expr.value is None:
+            self._emit(OpCode.NIL)
+        elif expr.value is True:
+            self._emit(OpCode.TRUE)
+        elif expr.value is False:
+            self._emit(OpCode.FALSE)
+        else:
+            self._emit(OpCode.CONSTANT, self._chunk.add_constant(expr.value))
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._compile_expr(expr.expression)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._compile_expr(expr.right)
+        if expr.operator.type == T.MINUS:
+            self._emit(OpCode.NEGATE, self._token(expr.operator))
+        else:
+            self._emit(OpCode.NOT)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._compile_expr(expr.left)
+        self._compile_expr(expr.right)
+        match expr.operator.type:
+            case T.BANG_EQUAL:
+                self._emit(OpCode.NOT_EQUAL)
+            case T.EQUAL_EQUAL:
+                self._emit(OpCode.EQUAL)
+            case _:
+                self._emit(_BINARY_OPS[expr.operator.type],
+                           self._token(expr.operator))
+
+    def visit_logical_expr(self, expr: Logical):
+        self._compile_expr(expr.left)
+        if expr.operator.type == T.OR:
+            # Skip the right operand when the left one is truthy.
+            else_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+            end_jump = self._emit_jump(OpCode.JUMP)
+            self._patch_jump(else_jump)
+        else:
+            end_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        self._compile_expr(expr.right)
+        self._patch_jump(end_jump)
+
+    def visit_variable_expr(self, expr: Variable):
+        slot = self._resolve_local(expr.name)
+        if slot != -1:
+            self._emit(OpCode.GET_LOCAL, slot)
+        else:
+            self._emit(OpCode.GET_GLOBAL, self._token(expr.name))
+
+    def visit_assign_expr(self, expr: Assign):
+        self._compile_expr(expr.value)
+        slot = self._resolve_local(expr.name)
+        if slot != -1:
+            self._emit(OpCode.SET_LOCAL, slot)
+        else:
+            self._emit(OpCode.SET_GLOBAL, self._token(expr.name))
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._compile_expr(stmt.expression)
+        self._emit(OpCode.POP)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._compile_expr(stmt.expression)
+        self._emit(OpCode.PRINT)
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is not None:
+            self._compile_expr(stmt.initializer)
+        else:
+            self._emit(OpCode.NIL)
+
+        if self._scope_sizes:
+            # The value just pushed is the local's slot.
+            self._locals.append(stmt.name.lexeme)
+            self._scope_sizes[-1] += 1
+        else:
+            self._emit(OpCode.DEFINE_GLOBAL, self._token(stmt.name))
+
+    def visit_block_stmt(self, stmt: Block):
+        self._scope_sizes.append(0)
+        for statement in stmt.statements:
+            self._compile_stmt(statement)
+        size = self._scope_sizes.pop()
+        if size:
+            del self._locals[-size:]
+            self._emit(OpCode.POP_N, size)
+
+    def visit_if_stmt(self, stmt: If):
+        self._compile_expr(stmt.condition)
+        then_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        self._compile_stmt(stmt.then_branch)
+        else_jump = self._emit_jump(OpCode.JUMP)
+
+        self._patch_jump(then_jump)
+        self._emit(OpCode.POP)
+        if stmt.else_branch is not None:
+            self._compile_stmt(stmt.else_branch)
+        self._patch_jump(else_jump)
+
+    def visit_while_stmt(self, stmt: While):
+        loop_start = len(self._chunk.code)
+        self._compile_expr(stmt.condition)
+        exit_jump = self._emit_jump(OpCode.JUMP_IF_FALSE)
+        self._emit(OpCode.POP)
+        self._compile_stmt(stmt.body)
+        self._emit(OpCode.LOOP, loop_start)
+
+        self._patch_jump(exit_jump)
+        self._emit(OpCode.POP)
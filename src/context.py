@@ -0,0 +1,19 @@
+from environment import Environment
+from error import Error
+from output import OutputSink, stdout_sink
+
+
+class RunContext:
+    """
+    Everything one run of a Lox program owns: its global variables, where
+    it prints, and its error state. Engines, the `Resolver` and `Plox` take
+    one, so separate runs share nothing and can execute in parallel threads.
+
+    By default output goes to the process-wide `stdout_sink`; give each
+    concurrent run its own `OutputSink` to keep their output apart.
+    """
+
+    def __init__(self, output: OutputSink | None = None) -> None:
+        self.output = output if output is not None else stdout_sink
+        self.errors = Error(self.output)
+        self.globals = Environment()
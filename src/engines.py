@@ -0,0 +1,13 @@
+from arena_interpreter import ArenaInterpreter
+from closure_compiler import ClosureCompiler
+from interpreter import Interpreter
+from transpiler import Transpiler
+from vm import Vm
+
+ENGINES = {
+    "tree": Interpreter,
+    "vm": Vm,
+    "closure": ClosureCompiler,
+    "python": Transpiler,
+    "arena": ArenaInterpreter,
+}
@@ -1,3 +1,4 @@
+from typing import List
 from _token import Token
 from error import LoxRuntimeError
 
@@ -29,3 +30,33 @@ class Environment():
             return
 
         raise LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
+
+class LocalEnvironment():
+    """
+    Block scope. Variables live in slots assigned by the `Resolver`, so
+    lookups are a fixed number of hops plus a list index instead of a
+    name lookup at every level.
+    """
+    __slots__ = ("values", "enclosing")
+
+    def __init__(self, enclosing) -> None:
+        self.values: List[object] = []
+        self.enclosing = enclosing
+
+    def define(self, value: object):
+        # Declarations in a block run in order, so the next slot is always
+        # the one the Resolver handed out.
+        self.values.append(value)
+
+    def ancestor(self, distance: int) -> "LocalEnvironment":
+        environment = self
+        for _ in range(distance):
+            environment = environment.enclosing
+        return environment
+
+    def get_at(self, distance: int, slot: int):
+        return self.ancestor(distance).values[slot]
+
+    def assign_at(self, distance: int, slot: int, value: object):
+        self.ancestor(distance).values[slot] = value
@@ -1,4 +1,5 @@
 from _token import TokenType, Token
+from output import OutputSink, stdout_sink
 
 
 class LoxRuntimeError(RuntimeError):
@@ -7,23 +8,41 @@ class LoxRuntimeError(RuntimeError):
         self.token = token
 
 
-class Error:
-    had_error = False
-    had_runtime_error = False
+class CompileError(Exception):
+    """Raised by `program.compile` for a source with syntax or resolution errors."""
+
+    def __init__(self, diagnostics: str) -> None:
+        super().__init__(diagnostics.rstrip("\n"))
+        self.diagnostics = diagnostics
 
-    def runtime_error(err: LoxRuntimeError):
-        print(f"{str(err)}\n[line {err.token.line}]")
-        Error.had_runtime_error = True
 
-    def parse_error(token: Token, message: str):
+class Error:
+    """
+    Reports the diagnostics of one run and remembers whether there were
+    any. Each run gets its own, so concurrent runs don't see each other's
+    errors.
+    """
+
+    def __init__(self, output: OutputSink = stdout_sink) -> None:
+        self.had_error = False
+        self.had_runtime_error = False
+        self._output = output
+
+    def runtime_error(self, err: LoxRuntimeError):
+        self._output.write_line(f"{str(err)}\n[line {err.token.line}]")
+        self._output.flush()
+        self.had_runtime_error = True
+
+    def parse_error(self, token: Token, message: str):
         if (token.type == TokenType.EOF):
-            Error.report(token.line, " at end", message)
+            self.report(token.line, " at end", message)
         else:
-            Error.report(token.line, " at ", token.lexeme + "'")
+            self.report(token.line, f" at '{token.lexeme}'", message)
 
-    def error(line, message):
-        Error.report(line, "", message)
+    def error(self, line, message):
+        self.report(line, "", message)
 
-    def report(line, where, message):
-        print(f"[line {line}] Error{where}: {message}")
-        Error.had_error = True
+    def report(self, line, where, message):
+        self._output.write_line(f"[line {line}] Error{where}: {message}")
+        self._output.flush()
+        self.had_error = True
@@ -16,7 +16,7 @@ class Assign(Expr):
     value: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_assign_expr(self)
 
 
 @dataclass(frozen=True)
@@ -26,7 +26,7 @@ class Binary(Expr):
     right: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_binary_expr(self)
 
 
 @dataclass(frozen=True)
@@ -34,7 +34,7 @@ class Grouping(Expr):
     expression: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_grouping_expr(self)
 
 
 @dataclass(frozen=True)
@@ -42,7 +42,7 @@ class Literal(Expr):
     value: typing.Any
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_literal_expr(self)
 
 
 @dataclass(frozen=True)
@@ -52,7 +52,7 @@ class Logical(Expr):
     right: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_logical_expr(self)
 
 
 @dataclass(frozen=True)
@@ -61,7 +61,7 @@ class Unary(Expr):
     right: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_unary_expr(self)
 
 
 @dataclass(frozen=True)
@@ -69,4 +69,4 @@ class Variable(Expr):
     name: Token
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_variable_expr(self)
@@ -0,0 +1,153 @@
+import io
+import os
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+from error import Error
+from output import OutputSink
+from parser import Parser
+from scanner import Scanner
+from stmt import Stmt
+from _token import Token
+from token_type import TokenType as T
+
+
+@dataclass(eq=False)
+class _Declaration:
+    """A parsed top-level declaration and the tokens it was parsed from."""
+    stmt: Stmt
+    tokens: List[Token]
+    first_line: int
+    last_line: int
+
+    def shift(self, lines: int):
+        for token in self.tokens:
+            token.line += lines
+        self.first_line += lines
+        self.last_line += lines
+
+
+class _SpanParser(Parser):
+    def spans(self) -> Iterator[_Declaration]:
+        """Yields each top-level declaration along with the tokens it spans."""
+        while not self._is_at_end():
+            start = self._current
+            stmt = self._declaration()
+            tokens = self._tokens[start:self._current]
+            first = tokens[0]
+            # A string token carries the line it ends on.
+            first_line = first.line - first.lexeme.count("\n") if first.type == T.STRING else first.line
+            yield _Declaration(stmt, tokens, first_line, tokens[-1].line)
+
+
+def _common_prefix(a: List[str], b: List[str]) -> int:
+    return len(os.path.commonprefix([a, b]))
+
+
+class IncrementalParser:
+    """
+    Parses successive versions of one source, re-scanning and re-parsing
+    only the top-level declarations an edit touches. Top-level declarations
+    don't depend on each other syntactically, so the ones before and after
+    the changed lines are reused as they are; those after it have their
+    tokens moved to their new lines in place, so trees returned for one
+    version are stale once the next version has been parsed.
+
+    State is only kept from versions without syntax errors. A version with
+    errors is scanned and parsed from scratch, so its diagnostics are
+    exactly those of a full parse.
+    """
+
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+        self._declarations: List[_Declaration] | None = None
+        # Declarations parsed by the last call to `parse`, and how many of the
+        # leading ones it kept from the version before.
+        self.reparsed = 0
+        self.reused = 0
+
+    @property
+    def source(self) -> str:
+        """The last version that parsed without errors."""
+        return "\n".join(self._lines)
+
+    def parse(self, source: str, errors: Error | None = None) -> List[Stmt]:
+        """Parses `source`, reporting to `errors` like `Scanner` and `Parser` would."""
+        lines = source.split("\n")
+        declarations = None
+        if self._declarations is not None:
+            declarations = self._reparse(lines)
+        if declarations is None:
+            declarations = self._parse_all(source, errors if errors is not None else Error())
+        else:
+            self._lines, self._declarations = lines, declarations
+        return [declaration.stmt for declaration in declarations]
+
+    def _parse_all(self, source: str, errors: Error) -> List[_Declaration]:
+        had_error, errors.had_error = errors.had_error, False
+        declarations = list(_SpanParser(Scanner(source, errors).scan_tokens(), errors).spans())
+        self.reparsed = len(declarations)
+        self.reused = 0
+        if not errors.had_error:
+            self._lines, self._declarations = source.split("\n"), declarations
+        errors.had_error = errors.had_error or had_error
+        return declarations
+
+    def _changed_region(self, lines: List[str]) -> Tuple[int, int, int]:
+        """
+        The old declarations before `start` and from `end` on can be kept;
+        the new source from line `first_line` up to the kept ones after the
+        change needs parsing. Returned as (start, end, first_line).
+        """
+        old = self._lines
+        declarations = self._declarations
+        prefix = _common_prefix(old, lines)
+        suffix = _common_prefix(old[prefix:][::-1], lines[prefix:][::-1])
+
+        # The first declaration reaching into the changed lines, or sharing a
+        # line with one that does.
+        start = 0
+        while start < len(declarations) and declarations[start].last_line <= prefix:
+            start += 1
+        while 0 < start < len(declarations) and \
+                declarations[start - 1].last_line >= declarations[start].first_line:
+            start -= 1
+        first_line = prefix + 1
+        if start < len(declarations):
+            first_line = min(first_line, declarations[start].first_line)
+
+        # The first declaration that starts a line in the unchanged suffix.
+        end = start
+        while end < len(declarations) and not (
+                declarations[end].first_line > len(old) - suffix and
+                (end == 0 or declarations[end - 1].last_line < declarations[end].first_line)):
+            end += 1
+        return start, end, first_line
+
+    def _reparse(self, lines: List[str]) -> List[_Declaration] | None:
+        """The declarations of the new version, or None if it needs a full parse."""
+        if lines == self._lines:
+            self.reparsed = 0
+            self.reused = len(self._declarations)
+            return self._declarations
+        start, end, first_line = self._changed_region(lines)
+        shift = len(lines) - len(self._lines)
+        last_line = len(lines)
+        if end < len(self._declarations):
+            last_line = self._declarations[end].first_line + shift - 1
+
+        # Errors here mean the edit may reach beyond the region (an
+        # unterminated string, say), so they are left to a full parse.
+        scratch = Error(OutputSink(stream=io.StringIO()))
+        region = "\n".join(lines[first_line - 1:last_line])
+        tokens = Scanner(region, scratch, first_line).scan_tokens()
+        parsed = list(_SpanParser(tokens, scratch).spans())
+        if scratch.had_error:
+            return None
+
+        kept = self._declarations[end:]
+        if shift:
+            for declaration in kept:
+                declaration.shift(shift)
+        self.reparsed = len(parsed)
+        self.reused = start
+        return self._declarations[:start] + parsed + kept
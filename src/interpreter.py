@@ -1,14 +1,17 @@
-from typing import List
-from decorators.visitor import visitor
-from environment import Environment
+import operator
+from typing import Callable, Dict, List, Tuple
+from context import RunContext
+from environment import LocalEnvironment
 from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
 from stmt import Block, Expression, If, Print, Stmt, Var, While
 from _token import Token
 from token_type import TokenType as T
 from utils.equality import is_equal
+from utils.rope import concat, is_string
 from utils.strings import stringify
 from utils.truthy import is_truthy
-from error import Error, LoxRuntimeError
+from error import LoxRuntimeError
+from loops import UNSET, CountedLoop, Invariant, analyze
 
 
 def check_number_operands(operator: Token, *operands: object):
@@ -19,8 +22,60 @@ def check_number_operands(operator: Token, *operands: object):
             raise LoxRuntimeError(operator, err_msg)
 
 
+# How many evaluations (with the same operand types, for a binary operator)
+# before a site gets a specialized fast path or inline cache. Code that runs
+# only a few times never pays for building one.
+QUICKEN_THRESHOLD = 8
+
+# Specialized implementations, by the operands' class and the operator.
+_SPECIALIZED: Dict[type, Dict[T, Callable[[object, object], object]]] = {
+    float: {
+        T.PLUS: operator.add,
+        T.MINUS: operator.sub,
+        T.STAR: operator.mul,
+        T.SLASH: operator.truediv,
+        T.GREATER: operator.gt,
+        T.GREATER_EQUAL: operator.ge,
+        T.LESS: operator.lt,
+        T.LESS_EQUAL: operator.le,
+        T.EQUAL_EQUAL: operator.eq,
+        T.BANG_EQUAL: operator.ne,
+    },
+    str: {
+        T.PLUS: concat,
+        T.EQUAL_EQUAL: operator.eq,
+        T.BANG_EQUAL: operator.ne,
+    },
+}
+
+# Heat of a binary operator that has been deoptimized; it stays generic.
+_GENERIC = -1
+
+
 class Interpreter:
-    _environment = Environment()
+    def __init__(self, context: RunContext | None = None) -> None:
+        self._context = context if context is not None else RunContext()
+        self._globals = self._context.globals
+        self._environment = self._globals
+        # (depth, slot) of every local variable reference, filled in by the Resolver.
+        self._locals: Dict[Token, Tuple[int, int]] = {}
+        self._output = self._context.output
+
+        # Per-interpreter specialization state, keyed by token because the
+        # syntax tree itself is immutable and may be shared between runs.
+        # Binary operator -> (operand class, implementation) once quickened.
+        self._quickened: Dict[Token, Tuple[type, Callable[[object, object], object]]] = {}
+        # Binary operator -> operand class it last saw.
+        self._seen: Dict[Token, type] = {}
+        # Site -> evaluations so far (for binary operators, consecutive ones
+        # with the same operand class).
+        self._heat: Dict[Token, int] = {}
+        # Variable name -> function reading or writing its resolved location.
+        self._readers: Dict[Token, Callable[[], object]] = {}
+        self._writers: Dict[Token, Callable[[object], None]] = {}
+        # id of a while loop -> (the loop, to keep the id taken, and its
+        # counted-loop plan, or None if it isn't one).
+        self._loops: Dict[int, Tuple[While, CountedLoop | None]] = {}
 
     def _evaluate(self, expr: Expr):
         return expr.accept(self)
@@ -28,7 +83,7 @@ class Interpreter:
     def _execute(self, stmt: Stmt):
         stmt.accept(self)
 
-    def _execute_block(self, statements: List[Stmt], environment: Environment):
+    def _execute_block(self, statements: List[Stmt], environment: LocalEnvironment):
         previous = self._environment
         try:
             self._environment = environment
@@ -37,60 +92,68 @@ class Interpreter:
         finally:
             self._environment = previous
 
-    @visitor(Literal)
-    def visit(self, expr: Literal):
+    def visit_literal_expr(self, expr: Literal):
         return expr.value
 
-    @visitor(Grouping)
-    def visit(self, expr: Grouping):
+    def visit_grouping_expr(self, expr: Grouping):
         return self._evaluate(expr.expression)
 
-    @visitor(Unary)
-    def visit(self, expr: Unary):
+    def visit_unary_expr(self, expr: Unary):
         right = self._evaluate(expr.right)
 
         match expr.operator.type:
             case T.MINUS:
-                check_number_operands(expr.operator, right)
-                return -float(right)
+                if right.__class__ is not float:
+                    check_number_operands(expr.operator, right)
+                return -right
             case T.BANG:
                 return not is_truthy(right)
         # Unreachable
         return None
 
-    @visitor(Binary)
-    def visit(self, expr: Binary):
+    def visit_binary_expr(self, expr: Binary):
         left = self._evaluate(expr.left)
         right = self._evaluate(expr.right)
 
+        quickened = self._quickened.get(expr.operator)
+        if quickened is not None:
+            guard, implementation = quickened
+            if left.__class__ is guard and right.__class__ is guard:
+                return implementation(left, right)
+        return self._binary(expr, left, right)
+
+    def _binary(self, expr: Binary, left: object, right: object):
+        """Generic path for `Binary`, which also decides when to quicken it."""
+        self._observe(expr.operator, left, right)
+
         match (expr.operator.type):
             case T.GREATER:
                 check_number_operands(expr.operator, left, right)
-                return float(left) > float(right)
+                return left > right
             case T.GREATER_EQUAL:
                 check_number_operands(expr.operator, left, right)
-                return float(left) >= float(right)
+                return left >= right
             case T.LESS:
                 check_number_operands(expr.operator, left, right)
-                return float(left) < float(right)
+                return left < right
             case T.LESS_EQUAL:
                 check_number_operands(expr.operator, left, right)
-                return float(left) <= float(right)
+                return left <= right
             case T.MINUS:
                 check_number_operands(expr.operator, left, right)
-                return float(left) - float(right)
+                return left - right
             case T.SLASH:
                 check_number_operands(expr.operator, left, right)
-                return float(left) / float(right)
+                return left / right
             case T.STAR:
                 check_number_operands(expr.operator, left, right)
-                return float(left) * float(right)
+                return left * right
             case T.PLUS:
                 # Only perform actions when both left and right instances are of the same type.
                 if isinstance(left, float) and isinstance(right, float):
                     return left + right
-                if isinstance(left, str) and isinstance(right, str):
-                    return left + right
+                if is_string(left) and is_string(right):
+                    return concat(left, right)
                 raise LoxRuntimeError(
                     expr.operator, "Operands must be two numbers or two strings.")
             case T.BANG_EQUAL:
@@ -100,18 +163,103 @@ class Interpreter:
         # Unreachable
         return None
 
-    @visitor(Variable)
-    def visit(self, expr: Variable):
-        return self._environment.get(expr.name)
+    def _observe(self, operator: Token, left: object, right: object):
+        if operator in self._quickened:
+            # A guard failed: go back to the generic path for good, rather
+            # than flip-flopping on a site that sees mixed types.
+            del self._quickened[operator]
+            self._heat[operator] = _GENERIC
+            return
+
+        heat = self._heat.get(operator, 0)
+        if heat < 0:
+            return
+        kind = left.__class__
+        if kind is not right.__class__:
+            self._heat[operator] = 0
+            return
+        if self._seen.get(operator) is not kind:
+            self._seen[operator] = kind
+            heat = 0
+        heat += 1
+        if heat >= QUICKEN_THRESHOLD:
+            implementation = _SPECIALIZED.get(kind, {}).get(operator.type)
+            if implementation is None:
+                # Nothing to specialize to, e.g. `nil == nil` or `"a" - "b"`.
+                heat = _GENERIC
+            else:
+                self._quickened[operator] = (kind, implementation)
+        self._heat[operator] = heat
 
-    @visitor(Assign)
-    def visit(self, expr: Assign):
+    def _reader(self, name: Token) -> Callable[[], object]:
+        """Builds the inline cache for reads of a variable: its lookup, unrolled."""
+        location = self._locals.get(name)
+        if location is None:
+            values = self._globals.values
+            lexeme = name.lexeme
+
+            def read_global():
+                try:
+                    return values[lexeme]
+                except KeyError:
+                    raise LoxRuntimeError(name, f"Undefined variable '{lexeme}'.") from None
+            return read_global
+
+        depth, slot = location
+        if depth == 0:
+            return lambda: self._environment.values[slot]
+        if depth == 1:
+            return lambda: self._environment.enclosing.values[slot]
+        return lambda: self._environment.get_at(depth, slot)
+
+    def _writer(self, name: Token) -> Callable[[object], None]:
+        location = self._locals.get(name)
+        if location is None:
+            return lambda value: self._globals.assign(name, value)
+        depth, slot = location
+        if depth == 0:
+            def write_local(value):
+                self._environment.values[slot] = value
+            return write_local
+        return lambda value: self._environment.assign_at(depth, slot, value)
+
+    def _warm(self, name: Token) -> bool:
+        """Counts an evaluation of a cold site; True once it deserves a cache."""
+        heat = self._heat.get(name, 0) + 1
+        self._heat[name] = heat
+        return heat >= QUICKEN_THRESHOLD
+
+    def _look_up_variable(self, name: Token):
+        if self._warm(name):
+            self._readers[name] = self._reader(name)
+        location = self._locals.get(name)
+        if location is None:
+            return self._globals.get(name)
+        return self._environment.get_at(*location)
+
+    def visit_variable_expr(self, expr: Variable):
+        reader = self._readers.get(expr.name)
+        if reader is not None:
+            return reader()
+        return self._look_up_variable(expr.name)
+
+    def visit_assign_expr(self, expr: Assign):
         value = self._evaluate(expr.value)
-        self._environment.assign(expr.name, value)
+        writer = self._writers.get(expr.name)
+        if writer is not None:
+            writer(value)
+            return value
+
+        if self._warm(expr.name):
+            self._writers[expr.name] = self._writer(expr.name)
+        location = self._locals.get(expr.name)
+        if location is None:
+            self._globals.assign(expr.name, value)
+        else:
+            self._environment.assign_at(*location, value)
         return value
 
-    @visitor(Logical)
-    def visit(self, expr: Logical):
+    def visit_logical_expr(self, expr: Logical):
         left = self._evaluate(expr.left)
         if expr.operator.type == T.OR:
             # Short circuit if truthy.
@@ -123,47 +271,114 @@ class Interpreter:
         # Evaluate right if left is not truthy.
         return self._evaluate(expr.right)
 
-    @visitor(Expression)
-    def visit(self, stmt: Expression):
+    def visit_expression_stmt(self, stmt: Expression):
         self._evaluate(stmt.expression)
         return None
 
-    @visitor(Print)
-    def visit(self, stmt: Print):
+    def visit_print_stmt(self, stmt: Print):
         value = self._evaluate(stmt.expression)
-        print(stringify(value))
+        self._output.write_line(stringify(value))
         return None
 
-    @visitor(Var)
-    def visit(self, stmt: Var):
+    def visit_var_stmt(self, stmt: Var):
         value = None
         if stmt.initializer is not None:
             value = self._evaluate(stmt.initializer)
-        self._environment.define(stmt.name.lexeme, value)
+        if stmt.name in self._locals:
+            self._environment.define(value)
+        else:
+            self._globals.define(stmt.name.lexeme, value)
         return None
 
-    @visitor(Block)
-    def visit(self, stmt: Block):
-        self._execute_block(stmt.statements, Environment(self._environment))
+    def visit_block_stmt(self, stmt: Block):
+        self._execute_block(stmt.statements,
+                            LocalEnvironment(self._environment))
         return None
 
-    @visitor(If)
-    def visit(self, stmt: If):
+    def visit_if_stmt(self, stmt: If):
         if is_truthy(self._evaluate(stmt.condition)):
             self._execute(stmt.then_branch)
         elif stmt.else_branch is not None:
             self._execute(stmt.else_branch)
         return None
 
-    @visitor(While)
-    def visit(self, stmt: While):
+    def visit_invariant_expr(self, expr: Invariant):
+        value = expr.memo[expr.index]
+        if value is UNSET:
+            value = expr.memo[expr.index] = self._evaluate(expr.expression)
+        return value
+
+    def visit_while_stmt(self, stmt: While):
+        entry = self._loops.get(id(stmt))
+        if entry is None:
+            entry = self._loops[id(stmt)] = (stmt, analyze(stmt, self._locals))
+        plan = entry[1]
+        if plan is not None and self._run_counted(plan):
+            return None
         while is_truthy(self._evaluate(stmt.condition)):
             self._execute(stmt.body)
         return None
 
-    def interpret(self, statements: List[Stmt]):
+    def _run_counted(self, plan: CountedLoop) -> bool:
+        """
+        Runs a counted loop with the counter kept in a Python float, or
+        returns False without running anything if the counter or the limit
+        isn't a number, leaving the loop to the generic path.
+        """
+        values = self._environment.values
+        i = values[plan.slot]
+        limit = self._evaluate(plan.limit)
+        if type(i) is not float or type(limit) is not float:
+            return False
+
+        plan.reset()
+        compare, step, body = plan.compare, plan.step, plan.body
+        previous = self._environment
+        try:
+            environment = LocalEnvironment(previous)
+            while compare(i, limit):
+                if plan.fresh_scope:
+                    environment = LocalEnvironment(previous)
+                self._environment = environment
+                for statement in body:
+                    self._execute(statement)
+                i += step
+                values[plan.slot] = i
+        finally:
+            self._environment = previous
+        return True
+
+    def resolve(self, name: Token, depth: int, slot: int):
+        self._locals[name] = (depth, slot)
+        # Caches built before this resolution would point at the wrong place.
+        self._readers.pop(name, None)
+        self._writers.pop(name, None)
+        self._heat.pop(name, None)
+
+    def forget_locals(self):
+        """Drops resolution and specialization data for statements that have finished running."""
+        self._locals.clear()
+        self._quickened.clear()
+        self._seen.clear()
+        self._heat.clear()
+        self._readers.clear()
+        self._writers.clear()
+        self._loops.clear()
+
+    def prepare(self, statements: List[Stmt]) -> Tuple[List[Stmt], Dict[Token, Tuple[int, int]]]:
+        """
+        What `execute` needs to run `statements` on any interpreter: the
+        tree itself, and where its local variables were resolved to.
+        """
+        return statements, self._locals
+
+    def execute(self, prepared: Tuple[List[Stmt], Dict[Token, Tuple[int, int]]]):
+        statements, self._locals = prepared
         try:
             for statement in statements:
                 self._execute(statement)
         except LoxRuntimeError as err:
-            Error.runtime_error(err)
+            self._context.errors.runtime_error(err)
+
+    def interpret(self, statements: List[Stmt]):
+        self.execute(self.prepare(statements))
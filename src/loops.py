@@ -0,0 +1,207 @@
+import operator
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Set, Tuple
+from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from _token import Token
+from token_type import TokenType as T
+
+_COMPARISONS: Dict[T, Callable[[float, float], bool]] = {
+    T.LESS: operator.lt,
+    T.LESS_EQUAL: operator.le,
+    T.GREATER: operator.gt,
+    T.GREATER_EQUAL: operator.ge,
+}
+
+# Marks an invariant that hasn't been evaluated yet in this run of its loop.
+UNSET = object()
+
+
+@dataclass(frozen=True, eq=False)
+class Invariant(Expr):
+    """
+    A loop-invariant pure expression in a counted loop's body. It is
+    evaluated where it stands the first time the loop reaches it, so any
+    runtime error happens exactly where it would have, and the value is
+    reused for the rest of that run of the loop.
+    """
+    expression: Expr
+    memo: List[object]
+    index: int
+
+    def accept(self, visitor):
+        return visitor.visit_invariant_expr(self)
+
+
+@dataclass(eq=False)
+class CountedLoop:
+    """
+    A `while` loop over a local number counter, in the shape `for` desugars to:
+
+        while (i < limit) { ...body; i = i + step; }
+
+    where `limit` is invariant, `step` is a number literal and nothing in
+    the body assigns `i`.
+    """
+    slot: int
+    compare: Callable[[float, float], bool]
+    limit: Expr
+    step: float
+    # The body without the increment, with invariants wrapped.
+    body: List[Stmt]
+    # Whether the body block declares variables of its own, and so needs a
+    # fresh environment each iteration.
+    fresh_scope: bool
+    # One entry per `Invariant` in `body`.
+    memo: List[object]
+
+    def reset(self):
+        self.memo[:] = [UNSET] * len(self.memo)
+
+
+def _children(node) -> List[object]:
+    match node:
+        case Block():
+            return node.statements
+        case Expression() | Print():
+            return [node.expression]
+        case Var():
+            return [] if node.initializer is None else [node.initializer]
+        case If():
+            return [node.condition, node.then_branch] + \
+                ([] if node.else_branch is None else [node.else_branch])
+        case While():
+            return [node.condition, node.body]
+        case Assign():
+            return [node.value]
+        case Binary() | Logical():
+            return [node.left, node.right]
+        case Grouping() | Invariant():
+            return [node.expression]
+        case Unary():
+            return [node.right]
+    return []
+
+
+def _variant_names(nodes: List[object]) -> Set[str]:
+    """Names assigned or declared anywhere under `nodes`."""
+    names = set()
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, (Assign, Var)):
+            names.add(node.name.lexeme)
+        pending.extend(_children(node))
+    return names
+
+
+def _is_invariant(expr: Expr, variant: Set[str]) -> bool:
+    """Whether `expr` has no side effects and reads nothing in `variant`."""
+    match expr:
+        case Literal() | Invariant():
+            return True
+        case Variable():
+            return expr.name.lexeme not in variant
+        case Grouping():
+            return _is_invariant(expr.expression, variant)
+        case Unary():
+            return _is_invariant(expr.right, variant)
+        case Binary() | Logical():
+            return _is_invariant(expr.left, variant) and _is_invariant(expr.right, variant)
+    return False
+
+
+class _Hoister:
+    """Wraps the largest invariant subexpressions of a loop body in `Invariant`."""
+
+    def __init__(self, variant: Set[str]) -> None:
+        self._variant = variant
+        self.memo: List[object] = []
+
+    def stmt(self, stmt: Stmt) -> Stmt:
+        match stmt:
+            case Expression():
+                return Expression(self.expr(stmt.expression))
+            case Print():
+                return Print(self.expr(stmt.expression))
+            case Var():
+                if stmt.initializer is None:
+                    return stmt
+                return Var(stmt.name, self.expr(stmt.initializer))
+            case Block():
+                return Block([self.stmt(statement) for statement in stmt.statements])
+            case If():
+                else_branch = None if stmt.else_branch is None else self.stmt(stmt.else_branch)
+                return If(self.expr(stmt.condition), self.stmt(stmt.then_branch), else_branch)
+            case While():
+                return While(self.expr(stmt.condition), self.stmt(stmt.body))
+        return stmt
+
+    def expr(self, expr: Expr) -> Expr:
+        match expr:
+            case Literal() | Variable() | Invariant():
+                # Nothing to save by caching these.
+                return expr
+        if _is_invariant(expr, self._variant):
+            self.memo.append(UNSET)
+            return Invariant(expr, self.memo, len(self.memo) - 1)
+        match expr:
+            case Assign():
+                return Assign(expr.name, self.expr(expr.value))
+            case Binary():
+                return Binary(self.expr(expr.left), expr.operator, self.expr(expr.right))
+            case Logical():
+                return Logical(self.expr(expr.left), expr.operator, self.expr(expr.right))
+            case Grouping():
+                return Grouping(self.expr(expr.expression))
+            case Unary():
+                return Unary(expr.operator, self.expr(expr.right))
+        return expr
+
+
+def analyze(loop: While, locals: Dict[Token, Tuple[int, int]]) -> CountedLoop | None:
+    """Recognizes a counted loop, given the resolver's locations for its variables."""
+    condition = loop.condition
+    if not (isinstance(condition, Binary) and condition.operator.type in _COMPARISONS
+            and isinstance(condition.left, Variable)):
+        return None
+    counter = condition.left.name
+    location = locals.get(counter)
+    if location is None or location[0] != 0:
+        # Only counters local to the block the loop runs in.
+        return None
+    slot = location[1]
+
+    if not (isinstance(loop.body, Block) and loop.body.statements):
+        return None
+    *body, last = loop.body.statements
+    if not (isinstance(last, Expression) and isinstance(last.expression, Assign)):
+        return None
+    increment = last.expression
+    step = increment.value
+    if not (locals.get(increment.name) == (1, slot) and isinstance(step, Binary)
+            and step.operator.type in (T.PLUS, T.MINUS)
+            and isinstance(step.left, Variable) and locals.get(step.left.name) == (1, slot)
+            and isinstance(step.right, Literal) and isinstance(step.right.value, float)):
+        return None
+
+    variant = _variant_names(body)
+    if counter.lexeme in variant:
+        # The body may assign the counter (or shadow it; stay on the safe side).
+        return None
+    variant.add(counter.lexeme)
+    if not _is_invariant(condition.right, variant):
+        return None
+
+    hoister = _Hoister(variant)
+    body = [hoister.stmt(statement) for statement in body]
+    amount = step.right.value
+    return CountedLoop(
+        slot=slot,
+        compare=_COMPARISONS[condition.operator.type],
+        limit=condition.right,
+        step=amount if step.operator.type == T.PLUS else -amount,
+        body=body,
+        fresh_scope=any(isinstance(statement, Var) for statement in body),
+        memo=hoister.memo,
+    )
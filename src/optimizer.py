@@ -0,0 +1,181 @@
+from typing import List
+from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from token_type import TokenType as T
+from utils.equality import is_equal
+from utils.truthy import is_truthy
+
+_FOLDABLE_NUMBER_OPS = {
+    T.GREATER: lambda a, b: a > b,
+    T.GREATER_EQUAL: lambda a, b: a >= b,
+    T.LESS: lambda a, b: a < b,
+    T.LESS_EQUAL: lambda a, b: a <= b,
+    T.MINUS: lambda a, b: a - b,
+    T.PLUS: lambda a, b: a + b,
+    T.STAR: lambda a, b: a * b,
+}
+
+
+def _is_empty_block(stmt: Stmt) -> bool:
+    return isinstance(stmt, Block) and not stmt.statements
+
+
+def _has_effects(expr: Expr) -> bool:
+    """Whether evaluating `expr` could assign, fail, or otherwise be observed."""
+    if isinstance(expr, Literal):
+        return False
+    if isinstance(expr, Grouping):
+        return _has_effects(expr.expression)
+    # Variables can be undefined, and operators can fail their type checks.
+    return True
+
+
+class Optimizer:
+    """
+    Rewrites a resolved program into a cheaper equivalent one: folds
+    constant arithmetic, string concatenation and comparisons, removes
+    `Grouping`, prunes branches and loops whose condition is a constant, and
+    drops empty blocks.
+
+    Anything that would fail at runtime (e.g. `"a" - 1`, or division by
+    zero) is left alone so the engine still reports it at its own line.
+    Blocks that declare variables are never merged or removed, so the
+    resolver's scope depths and slots stay valid. Unchanged subtrees are
+    reused rather than copied.
+    """
+
+    def optimize(self, statements: List[Stmt]) -> List[Stmt]:
+        return self._statements(statements)
+
+    def _statements(self, statements: List[Stmt]) -> List[Stmt]:
+        optimized = []
+        for statement in statements:
+            statement = self._stmt(statement)
+            if statement is not None and not _is_empty_block(statement):
+                optimized.append(statement)
+        return optimized
+
+    def _stmt(self, stmt: Stmt) -> Stmt | None:
+        return stmt.accept(self)
+
+    def _expr(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def _branch(self, stmt: Stmt) -> Stmt:
+        # A branch must stay a statement, even if nothing is left of it.
+        optimized = self._stmt(stmt)
+        return Block([]) if optimized is None else optimized
+
+    def visit_literal_expr(self, expr: Literal):
+        return expr
+
+    def visit_variable_expr(self, expr: Variable):
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return self._expr(expr.expression)
+
+    def visit_assign_expr(self, expr: Assign):
+        value = self._expr(expr.value)
+        return expr if value is expr.value else Assign(expr.name, value)
+
+    def visit_unary_expr(self, expr: Unary):
+        right = self._expr(expr.right)
+        if isinstance(right, Literal):
+            if expr.operator.type == T.BANG:
+                return Literal(not is_truthy(right.value))
+            if isinstance(right.value, float):
+                return Literal(-right.value)
+        return expr if right is expr.right else Unary(expr.operator, right)
+
+    def visit_binary_expr(self, expr: Binary):
+        left = self._expr(expr.left)
+        right = self._expr(expr.right)
+        if isinstance(left, Literal) and isinstance(right, Literal):
+            folded = self._fold(expr.operator.type, left.value, right.value)
+            if folded is not None:
+                return folded
+        if left is expr.left and right is expr.right:
+            return expr
+        return Binary(left, expr.operator, right)
+
+    def _fold(self, type: T, a: object, b: object) -> Literal | None:
+        match type:
+            case T.EQUAL_EQUAL:
+                return Literal(is_equal(a, b))
+            case T.BANG_EQUAL:
+                return Literal(not is_equal(a, b))
+            case T.PLUS if isinstance(a, str) and isinstance(b, str):
+                return Literal(a + b)
+            case T.SLASH if isinstance(a, float) and isinstance(b, float) and b != 0:
+                return Literal(a / b)
+        if type in _FOLDABLE_NUMBER_OPS and isinstance(a, float) and isinstance(b, float):
+            return Literal(_FOLDABLE_NUMBER_OPS[type](a, b))
+        # Leave it for the engine to evaluate, or to report.
+        return None
+
+    def visit_logical_expr(self, expr: Logical):
+        left = self._expr(expr.left)
+        right = self._expr(expr.right)
+        if isinstance(left, Literal):
+            if expr.operator.type == T.OR:
+                return left if is_truthy(left.value) else right
+            return right if is_truthy(left.value) else left
+        if left is expr.left and right is expr.right:
+            return expr
+        return Logical(left, expr.operator, right)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        expression = self._expr(stmt.expression)
+        if not _has_effects(expression):
+            return None
+        return stmt if expression is stmt.expression else Expression(expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        expression = self._expr(stmt.expression)
+        return stmt if expression is stmt.expression else Print(expression)
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is None:
+            return stmt
+        initializer = self._expr(stmt.initializer)
+        return stmt if initializer is stmt.initializer else Var(stmt.name, initializer)
+
+    def visit_block_stmt(self, stmt: Block):
+        statements = self._statements(stmt.statements)
+        if len(statements) == len(stmt.statements) and \
+                all(new is old for new, old in zip(statements, stmt.statements)):
+            return stmt
+        return Block(statements)
+
+    def visit_if_stmt(self, stmt: If):
+        condition = self._expr(stmt.condition)
+        if isinstance(condition, Literal):
+            if is_truthy(condition.value):
+                return self._stmt(stmt.then_branch)
+            if stmt.else_branch is None:
+                return None
+            return self._stmt(stmt.else_branch)
+
+        then_branch = self._branch(stmt.then_branch)
+        else_branch = None
+        if stmt.else_branch is not None:
+            else_branch = self._branch(stmt.else_branch)
+            if _is_empty_block(else_branch):
+                else_branch = None
+        if else_branch is None and _is_empty_block(then_branch):
+            # Only the condition's side effects remain.
+            return Expression(condition) if _has_effects(condition) else None
+        if condition is stmt.condition and then_branch is stmt.then_branch \
+                and else_branch is stmt.else_branch:
+            return stmt
+        return If(condition, then_branch, else_branch)
+
+    def visit_while_stmt(self, stmt: While):
+        condition = self._expr(stmt.condition)
+        if isinstance(condition, Literal) and not is_truthy(condition.value):
+            return None
+        body = self._branch(stmt.body)
+        if condition is stmt.condition and body is stmt.body:
+            return stmt
+        return While(condition, body)
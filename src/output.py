@@ -0,0 +1,59 @@
+import atexit
+import sys
+from typing import List, TextIO
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+class OutputSink:
+    """
+    Buffers what a Lox program prints and writes it out in large chunks.
+
+    The buffer is written to `stream` (by default whatever `sys.stdout` is
+    at the time) and flushed when it reaches `buffer_size` characters, after
+    every newline if `line_buffered`, on every write if `buffer_size` is 0,
+    and on `flush()`, which `Plox` calls before exiting. Diagnostics from
+    `Error` go through the same sink, so they stay in order with the output
+    around them.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE, line_buffered: bool = False,
+                 stream: TextIO | None = None) -> None:
+        self._parts: List[str] = []
+        self._size = 0
+        self.stream = stream
+        self.configure(buffer_size, line_buffered)
+
+    def configure(self, buffer_size: int = DEFAULT_BUFFER_SIZE, line_buffered: bool = False):
+        self.flush()
+        self.buffer_size = buffer_size
+        self.line_buffered = line_buffered
+        # `write_line` always ends a line, so line buffering flushes each call.
+        self._limit = 0 if line_buffered else buffer_size
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size or (self.line_buffered and "\n" in text):
+            self.flush()
+
+    def write_line(self, text: str):
+        self._parts.append(text)
+        self._parts.append("\n")
+        self._size += len(text) + 1
+        if self._size >= self._limit:
+            self.flush()
+
+    def flush(self):
+        stream = self.stream if self.stream is not None else sys.stdout
+        if self._parts:
+            text = "".join(self._parts)
+            self._parts.clear()
+            self._size = 0
+            stream.write(text)
+        stream.flush()
+
+
+# Where engines print and `Error` reports, unless given another sink.
+stdout_sink = OutputSink()
+atexit.register(stdout_sink.flush)
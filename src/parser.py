@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, Iterable, Iterator, List, Tuple
 from error import Error
 from _token import Token
 from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
@@ -6,12 +6,48 @@ from stmt import Block, Expression, If, Print, Stmt, Var, While
 from token_type import TokenType as T
 
 
+# Precedence levels, loosest first.
+_ASSIGNMENT = 1
+_OR = 2
+_AND = 3
+_EQUALITY = 4
+_COMPARISON = 5
+_TERM = 6
+_FACTOR = 7
+_UNARY = 8
+
+# Infix operator -> (precedence, node it builds).
+_INFIX: Dict[T, Tuple[int, type]] = {
+    T.OR: (_OR, Logical),
+    T.AND: (_AND, Logical),
+    T.BANG_EQUAL: (_EQUALITY, Binary),
+    T.EQUAL_EQUAL: (_EQUALITY, Binary),
+    T.GREATER: (_COMPARISON, Binary),
+    T.GREATER_EQUAL: (_COMPARISON, Binary),
+    T.LESS: (_COMPARISON, Binary),
+    T.LESS_EQUAL: (_COMPARISON, Binary),
+    T.MINUS: (_TERM, Binary),
+    T.PLUS: (_TERM, Binary),
+    T.SLASH: (_FACTOR, Binary),
+    T.STAR: (_FACTOR, Binary),
+}
+
+_KEYWORD_LITERALS = {T.FALSE: False, T.TRUE: True, T.NIL: None}
+
+# Kinds of `_expression` stack frames other than infix operators, whose
+# frames hold the node class to build.
+_UNARY_FRAME = 0
+_GROUP_FRAME = 1
+_ASSIGN_FRAME = 2
+
+
 class ParseError(RuntimeError):
     '''raise this when there's a parse error'''
 
 
 class Parser:
-    def __init__(self, tokens: List[Token]) -> None:
+    def __init__(self, tokens: List[Token], errors: Error | None = None) -> None:
+        self._errors = errors if errors is not None else Error()
         self._tokens = tokens
         self._current = 0
 
@@ -52,7 +88,7 @@ class Parser:
             self._advance()
 
     def _error(self, token: Token, err_msg: str):
-        Error.parse_error(token, err_msg)
+        self._errors.parse_error(token, err_msg)
         return ParseError()
 
     def _consume(self, type: T, err_msg: str):
@@ -60,96 +96,78 @@ class Parser:
             return self._advance()
         raise self._error(self._peek(), err_msg)
 
-    def _primary(self):
-        if self._match(T.FALSE):
-            return Literal(False)
-        if self._match(T.TRUE):
-            return Literal(True)
-        if self._match(T.NIL):
-            return Literal(None)
-
-        if self._match(T.IDENTIFIER):
-            return Variable(self._previous())
-
-        if self._match(T.NUMBER, T.STRING):
-            return Literal(self._previous().literal)
-
-        if self._match(T.LEFT_PAREN):
-            expr = self._expression()
-            self._consume(T.RIGHT_PAREN, "Expect ')' after expression.")
-            return Grouping(expr)
-
-        raise self._error(self._peek(), "Expect expression.")
-
-    def _unary(self):
-        while self._match(T.BANG, T.MINUS):
-            operator = self._previous()
-            right = self._unary()
-            return Unary(operator, right)
-        return self._primary()
-
-    def _factor(self):
-        expr = self._unary()
-        while self._match(T.SLASH, T.STAR):
-            operator = self._previous()
-            right = self._unary()
-            expr = Binary(expr, operator, right)
-        return expr
-
-    def _term(self):
-        expr = self._factor()
-        while self._match(T.MINUS, T.PLUS):
-            operator = self._previous()
-            right = self._factor()
-            expr = Binary(expr, operator, right)
-        return expr
-
-    def _comparison(self):
-        expr = self._term()
-        while self._match(T.GREATER, T.GREATER_EQUAL, T.LESS, T.LESS_EQUAL):
-            operator = self._previous()
-            right = self._term()
-            expr = Binary(expr, operator, right)
-        return expr
-
-    def _equality(self):
-        expr = self._comparison()
-        while self._match(T.BANG_EQUAL, T.EQUAL_EQUAL):
-            operator = self._previous()
-            right = self._comparison()
-            expr = Binary(expr, operator, right)
-        return expr
-
-    def _and(self):
-        expr = self._equality()
-        while self._match(T.AND):
-            operator = self._previous()
-            right = self._equality
-            expr = Logical(expr, operator, right)
-        return expr
-
-    def _or(self):
-        expr = self._and()
-        while self._match(T.OR):
-            operator = self._previous()
-            right = self._and()
-            expr = Logical(expr, operator, right)
-        return expr
-
-    def _assignment(self):
-        expr = self._or()
-
-        if self._match(T.EQUAL):
-            equals = self._previous()
-            value = self._assignment()
-            if isinstance(expr, Variable):
-                name = expr.name
-                return Assign(name, value)
-            self._error(equals, "Invalid assignment target.")
-        return expr
+    def _primary(self) -> Expr:
+        """A literal or a variable; groupings are handled by `_expression`."""
+        token = self._peek()
+        type = token.type
+        if type == T.IDENTIFIER:
+            return Variable(self._advance())
+        if type == T.NUMBER or type == T.STRING:
+            return Literal(self._advance().literal)
+        if type in _KEYWORD_LITERALS:
+            self._advance()
+            return Literal(_KEYWORD_LITERALS[type])
+        raise self._error(token, "Expect expression.")
 
-    def _expression(self):
-        return self._assignment()
+    def _expression(self) -> Expr:
+        """
+        Parses an expression by precedence climbing over `_INFIX`. Operators
+        waiting for their right operand, open groupings and assignments wait
+        on an explicit stack rather than in Python calls, so there is no
+        call per precedence level and nesting depth isn't limited by
+        recursion.
+
+        Builds the same trees as the grammar's recursive descent: binary
+        operators are left-associative, assignment is right-associative and
+        only allowed where a whole expression is (at the top, inside
+        parentheses, or as another assignment's value).
+        """
+        # Frames of (kind, left operand or prefix operator, operator, the
+        # minimum precedence to go back to).
+        stack = []
+        min_precedence = _ASSIGNMENT
+        while True:
+            type = self._peek().type
+            if type == T.BANG or type == T.MINUS:
+                stack.append((_UNARY_FRAME, self._advance(), None, min_precedence))
+                min_precedence = _UNARY
+                continue
+            if type == T.LEFT_PAREN:
+                self._advance()
+                stack.append((_GROUP_FRAME, None, None, min_precedence))
+                min_precedence = _ASSIGNMENT
+                continue
+            expr = self._primary()
+
+            # Fold finished operands into their frames until an operator
+            # wants another operand.
+            while True:
+                type = self._peek().type
+                infix = _INFIX.get(type)
+                if infix is not None and infix[0] >= min_precedence:
+                    stack.append((infix[1], expr, self._advance(), min_precedence))
+                    min_precedence = infix[0] + 1
+                    break
+                if type == T.EQUAL and min_precedence == _ASSIGNMENT:
+                    stack.append((_ASSIGN_FRAME, expr, self._advance(), min_precedence))
+                    break
+                if not stack:
+                    return expr
+
+                kind, left, operator, min_precedence = stack.pop()
+                if kind == _UNARY_FRAME:
+                    expr = Unary(left, expr)
+                elif kind == _GROUP_FRAME:
+                    self._consume(T.RIGHT_PAREN, "Expect ')' after expression.")
+                    expr = Grouping(expr)
+                elif kind == _ASSIGN_FRAME:
+                    if isinstance(left, Variable):
+                        expr = Assign(left.name, expr)
+                    else:
+                        self._error(operator, "Invalid assignment target.")
+                        expr = left
+                else:
+                    expr = kind(left, operator, expr)
 
     def _print_statement(self):
         value = self._expression()
@@ -292,7 +310,34 @@ class Parser:
 
     # Finally public functions
     def parse(self) -> List[Stmt]:
-        statements: List[Stmt] = []
+        return list(self.declarations())
+
+    def declarations(self) -> Iterator[Stmt]:
+        """Yields each top-level declaration as soon as it has been parsed."""
         while not self._is_at_end():
-            statements.append(self._declaration())
-        return statements
+            yield self._declaration()
+
+
+class StreamingParser(Parser):
+    """
+    Parser that pulls tokens from an iterator instead of indexing a list, so
+    only the current and previous tokens are held at any time.
+    """
+
+    def __init__(self, tokens: Iterable[Token], errors: Error | None = None) -> None:
+        self._errors = errors if errors is not None else Error()
+        self._stream = iter(tokens)
+        self._next = next(self._stream)
+        self._last: Token = None
+
+    def _peek(self) -> Token:
+        return self._next
+
+    def _previous(self) -> Token:
+        return self._last
+
+    def _advance(self) -> Token:
+        if not self._is_at_end():
+            self._last = self._next
+            self._next = next(self._stream)
+        return self._last
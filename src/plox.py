@@ -1,58 +1,356 @@
+import argparse
+import mmap
+import os
 import sys
+from contextlib import nullcontext
+from arena import ArenaBuilder, ArenaReader, AstArena
+from arena_interpreter import ArenaInterpreter
 from ast_printer import AstPrinter
+from batch import run_batch
+from cache import ProgramCache
+from context import RunContext
+from engines import ENGINES
+from incremental import IncrementalParser
 from interpreter import Interpreter
-from parser import Parser
+from optimizer import Optimizer
+from output import DEFAULT_BUFFER_SIZE, stdout_sink
+from parser import Parser, StreamingParser
+from profiler import Profiler, count_nodes
+from resolver import Resolver
+from sampler import Sampler
+from scanner import ByteScanner, Scanner
+from watch import watch
 
-from scanner import Scanner
-from error import Error
 
+class _ArgumentParser(argparse.ArgumentParser):
+    def error(self, message: str):
+        self.print_usage()
+        sys.exit(64)
 
-class Plox:
-    interpreter = Interpreter()
 
-    def __init__(self) -> None:
+def _parse_args(argv):
+    arg_parser = _ArgumentParser(prog="plox")
+    arg_parser.add_argument("script", nargs="?")
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree",
+                            help="execution engine (default: tree)")
+    arg_parser.add_argument("--compact-tokens", action="store_true",
+                            help="keep tokens in a compact buffer instead of Token objects")
+    arg_parser.add_argument("--vector-scan", action="store_true",
+                            help="find tokens with a NumPy pre-pass, for very large scripts "
+                                 "(ignored if NumPy isn't installed)")
+    arg_parser.add_argument("--mmap", action="store_true",
+                            help="map the script into memory and scan its bytes in place, "
+                                 "decoding names and strings only when they are used")
+    arg_parser.add_argument("--no-optimize", dest="optimize", action="store_false",
+                            help="skip constant folding and dead branch pruning")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="run each top-level statement as soon as it is parsed")
+    arg_parser.add_argument("--no-cache", dest="cache", action="store_false",
+                            help="neither read nor write the on-disk program cache")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="report phase times and per-node statistics on stderr "
+                                 "(implies --no-cache)")
+    arg_parser.add_argument("--unbuffered", action="store_true",
+                            help="write program output as soon as it is printed")
+    arg_parser.add_argument("--output-buffer", metavar="BYTES", type=int,
+                            default=DEFAULT_BUFFER_SIZE,
+                            help="flush program output every BYTES characters "
+                                 f"(default: {DEFAULT_BUFFER_SIZE}; line by line on a terminal)")
+    arg_parser.add_argument("--sample", metavar="FILE",
+                            help="sample the running statements and write collapsed stacks "
+                                 "(flamegraph input) to FILE; a per-line report goes to stderr")
+    arg_parser.add_argument("--sample-interval", metavar="MS", type=float, default=5.0,
+                            help="milliseconds between samples (default: 5)")
+    arg_parser.add_argument("--batch", metavar="PATTERN",
+                            help="run every script in a directory or matching a glob, "
+                                 "printing one JSON line of results per script")
+    arg_parser.add_argument("--jobs", metavar="N", type=int, default=os.cpu_count(),
+                            help="worker processes for --batch (default: one per CPU)")
+    arg_parser.add_argument("--timeout", metavar="SECONDS", type=float,
+                            help="stop a --batch script that runs longer than this")
+    arg_parser.add_argument("--watch", metavar="FILE",
+                            help="run FILE, then run it again each time it is saved, "
+                                 "re-parsing only the declarations that changed")
+    args = arg_parser.parse_args(argv)
+    if args.watch is not None and (args.script is not None or args.batch is not None):
+        arg_parser.error("--watch cannot be combined with a script or --batch")
+    if args.watch is not None and (args.stream or args.sample):
+        arg_parser.error("--watch cannot be combined with --stream or --sample")
+    if args.batch is not None and args.script is not None:
+        arg_parser.error("--batch cannot be combined with a script")
+    if args.batch is not None and (args.profile or args.sample):
+        arg_parser.error("--batch cannot be combined with --profile or --sample")
+    if args.vector_scan and args.stream:
+        arg_parser.error("--vector-scan cannot be combined with --stream")
+    if args.mmap and (args.stream or args.vector_scan):
+        arg_parser.error("--mmap cannot be combined with --stream or --vector-scan")
+    if args.profile and args.stream:
+        arg_parser.error("--profile cannot be combined with --stream")
+    if args.sample and args.engine != "tree":
+        arg_parser.error("--sample requires --engine tree")
+    return args
+
+
+def _map_file(file_path: str) -> mmap.mmap | None:
+    """
+    Maps a script into memory, or returns None if it is empty or has
+    anything `ByteScanner` doesn't take, for it to be read as text instead.
+    """
+    with open(file_path, "rb") as file:
+        try:
+            source = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped.
+            return None
+    if not ByteScanner.accepts(source):
+        source.close()
+        return None
+    return source
 
-        # 1st element of sys.argv is always invoked file
-        if len(sys.argv) > 2:
-            print('Usage: plox [script]')
-            sys.exit(64)
-        elif len(sys.argv) == 2:
-            self.run_file(sys.argv[1])
-        else:
-            self.run_prompt()
+
+class Plox:
+    def __init__(self, args: argparse.Namespace, context: RunContext | None = None) -> None:
+        self.context = context if context is not None else RunContext(stdout_sink)
+        self.errors = self.context.errors
+        self.interpreter = ENGINES[args.engine](self.context)
+        self.stream = args.stream
+        self.compact_tokens = args.compact_tokens
+        self.vector_scan = args.vector_scan
+        self.mapped = args.mmap
+        self.optimize = args.optimize
+        # A cache hit would skip the scan and parse phases a profile reports.
+        self.cache = ProgramCache() if args.cache and not args.profile else None
+        self.profiler = None
+        if args.profile:
+            self.profiler = Profiler()
+            if isinstance(self.interpreter, Interpreter):
+                self.profiler.instrument(self.interpreter)
+        self.sample_file = args.sample
+        self.sampler = None
+        if args.sample:
+            self.sampler = Sampler(args.sample_interval / 1000)
 
     def run_file(self, file_path: str) -> None:
-        with open(file_path) as file:
-            file_data = file.read()
-            self.run(file_data)
-            if Error.had_error:
-                sys.exit(65)
-            if Error.had_runtime_error:
-                sys.exit(70)
-
-    def run(self, source: str):
-        scanner = Scanner(source)
-        tokens = scanner.scan_tokens()
-        parser = Parser(tokens)
-        statements = parser.parse()
+        status = self.execute_file(file_path)
+        if status:
+            sys.exit(status)
+
+    def execute_file(self, file_path: str) -> int:
+        """Runs a script and returns the status `run_file` would exit with."""
+        source = _map_file(file_path) if self.mapped else None
+        if source is None:
+            with open(file_path) as file:
+                source = file.read()
+        try:
+            with self.sampler or nullcontext():
+                if self.stream:
+                    self.run_streaming(source)
+                else:
+                    self.run(source, self.cache)
+        finally:
+            if isinstance(source, mmap.mmap):
+                source.close()
+        self.context.output.flush()
+        if self.profiler is not None:
+            self.profiler.report()
+        if self.sampler is not None:
+            self.write_samples()
+        if self.errors.had_error:
+            return 65
+        if self.errors.had_runtime_error:
+            return 70
+        return 0
+
+    def _phase(self, name: str):
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
+
+    def write_samples(self):
+        with open(self.sample_file, "w") as file:
+            self.sampler.write_collapsed(file)
+        self.sampler.report()
+
+    def run(self, source: str | mmap.mmap, cache: ProgramCache | None = None):
+        """
+        Scans, parses, resolves, optimizes and runs `source`. A script
+        mapped with `_map_file` is scanned in place.
+        """
+        if cache is not None:
+            with self._phase("cache"):
+                key = cache.key(source, self.optimize)
+                arena = cache.load(key)
+            if arena is not None:
+                self.run_arena(arena)
+                return
+
+        with self._phase("scan"):
+            if not isinstance(source, str):
+                tokens = ByteScanner(source, self.errors).scan_buffer()
+            elif self.vector_scan:
+                tokens = Scanner(source, self.errors).scan_vectorized(self.compact_tokens)
+            elif self.compact_tokens:
+                tokens = Scanner(source, self.errors).scan_buffer()
+            else:
+                tokens = Scanner(source, self.errors).scan_tokens()
+        with self._phase("parse"):
+            parser = Parser(tokens, self.errors)
+            statements = parser.parse()
+        if self.profiler is not None:
+            self.profiler.counts["tokens"] = len(tokens)
+            self.profiler.parsed_nodes = count_nodes(statements)
 
         # Stop if there was a syntax error.
-        if Error.had_error:
+        if self.errors.had_error:
             return
 
-        self.interpreter.interpret(statements)
+        with self._phase("resolve"):
+            resolver = Resolver(self.interpreter, self.errors)
+            resolver.resolve(statements)
+
+        # Stop if there was a resolution error.
+        if self.errors.had_error:
+            return
+
+        if self.optimize:
+            with self._phase("optimize"):
+                statements = Optimizer().optimize(statements)
+
+        if cache is not None:
+            with self._phase("cache"):
+                cache.store(key, ArenaBuilder(resolver.locals).build(statements))
+
+        self._interpret(statements)
+
+    def _interpret(self, statements):
+        if self.profiler is not None:
+            self.profiler.program_nodes = count_nodes(statements)
+        with self._phase("execute"):
+            self.interpreter.interpret(statements)
+
+    def run_incremental(self, source: str, parser: IncrementalParser, start: int = 0) -> int:
+        """
+        Like `run`, but parses with `parser`, which only re-parses the
+        declarations that changed since the last version it saw. The first
+        `start` statements are taken to have run already and are skipped.
+        Returns how many statements the source has.
+
+        If the source only parses by changing one of the first `start`
+        statements (an `else` added after an `if`, say), that is reported as
+        an error and `parser` is left as it was.
+        """
+        previous = parser.source
+        with self._phase("parse"):
+            statements = parser.parse(source, self.errors)
+        if self.errors.had_error:
+            return len(statements)
+        if parser.reused < start:
+            self._reject_continuation(source, previous, parser)
+            return start
+        count = len(statements)
+        statements = statements[start:]
+
+        with self._phase("resolve"):
+            Resolver(self.interpreter, self.errors).resolve(statements)
+        if self.errors.had_error:
+            return count
+
+        if self.optimize:
+            with self._phase("optimize"):
+                statements = Optimizer().optimize(statements)
+        self._interpret(statements)
+        return count
+
+    def _reject_continuation(self, source: str, previous: str, parser: IncrementalParser):
+        # Report what parsing the new lines on their own finds wrong with
+        # them, which is what they would get without the statements before.
+        first_line = previous.count("\n") + 1
+        added = source[len(previous):] if source.startswith(previous) else source
+        Parser(Scanner(added, self.errors, first_line).scan_tokens(), self.errors).parse()
+        if not self.errors.had_error:
+            self.errors.error(first_line, "Changes a statement that has already run.")
+        # `previous` parsed cleanly before, so this reports nothing.
+        parser.parse(previous)
+
+    def run_arena(self, arena: AstArena):
+        """Runs a program that was already parsed, resolved and optimized."""
+        if isinstance(self.interpreter, ArenaInterpreter):
+            with self._phase("execute"):
+                self.interpreter.run(arena)
+        else:
+            with self._phase("cache"):
+                statements = ArenaReader(self.interpreter).read(arena)
+            self._interpret(statements)
+
+    def run_streaming(self, source: str):
+        """
+        Scans, parses and runs one top-level declaration at a time, so tokens
+        and syntax trees for the rest of the file are never held in memory.
+
+        Unlike `run`, statements before a syntax error have already run by
+        the time it is found. Nothing runs after the first error of either
+        kind, but parsing continues so later syntax errors are still reported.
+        """
+        parser = StreamingParser(Scanner(source, self.errors).iter_tokens(), self.errors)
+        resolver = Resolver(self.interpreter, self.errors)
+        for statement in parser.declarations():
+            if self.errors.had_error or self.errors.had_runtime_error:
+                continue
+            statements = [statement]
+            resolver.resolve(statements)
+            if self.errors.had_error:
+                continue
+            if self.optimize:
+                statements = Optimizer().optimize(statements)
+            self.interpreter.interpret(statements)
+            # Top-level statements share nothing but globals.
+            self.interpreter.forget_locals()
 
     def run_prompt(self) -> None:
+        # The session so far is one growing program: each line is parsed as
+        # an edit that appends to it, and only its new statements run. Lines
+        # with compile errors are left out of the session.
+        session = IncrementalParser()
+        source = ""
+        executed = 0
         while True:
             try:
                 line = input("> ")
                 if line == "":
                     break
-                self.run(line)
-                Error.had_error = False  # Reset errors if any in prompt
+                count = self.run_incremental(source + line + "\n", session, executed)
+                if not self.errors.had_error:
+                    source += line + "\n"
+                    executed = count
+                self.context.output.flush()
+                if self.profiler is not None:
+                    self.profiler.report()
+                self.errors.had_error = False  # Reset errors if any in prompt
             except EOFError:
                 break
 
 
+def main():
+    # 1st element of sys.argv is always invoked file
+    args = _parse_args(sys.argv[1:])
+    if args.batch is not None:
+        sys.exit(run_batch(args))
+
+    stdout_sink.configure(0 if args.unbuffered else args.output_buffer,
+                          line_buffered=sys.stdout.isatty())
+    if args.watch is not None:
+        try:
+            watch(args.watch, args)
+        except KeyboardInterrupt:
+            pass
+        return
+
+    plox = Plox(args)
+    if args.script is not None:
+        plox.run_file(args.script)
+    else:
+        plox.run_prompt()
+
+
 if __name__ == "__main__":
-    plox = Plox()
+    main()
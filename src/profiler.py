@@ -0,0 +1,134 @@
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import fields
+from typing import Dict, List
+import expr
+import stmt
+
+
+def _visitor_names() -> Dict[str, str]:
+    """Maps each `visit_*` method name to the node type it handles."""
+    names = {}
+    for module, base, suffix in ((expr, expr.Expr, "expr"), (stmt, stmt.Stmt, "stmt")):
+        for value in vars(module).values():
+            if isinstance(value, type) and issubclass(value, base) and value is not base:
+                names[f"visit_{value.__name__.lower()}_{suffix}"] = value.__name__
+    return names
+
+
+VISITORS = _visitor_names()
+
+
+def count_nodes(statements: List[stmt.Stmt]) -> Dict[str, int]:
+    """Number of syntax tree nodes of each type reachable from `statements`."""
+    counts: Dict[str, int] = {}
+    pending = list(statements)
+    while pending:
+        node = pending.pop()
+        if node is None:
+            # Left behind by a syntax error.
+            continue
+        name = type(node).__name__
+        counts[name] = counts.get(name, 0) + 1
+        for field in fields(node):
+            value = getattr(node, field.name)
+            if isinstance(value, (expr.Expr, stmt.Stmt)):
+                pending.append(value)
+            elif isinstance(value, list):
+                pending.extend(value)
+    return counts
+
+
+class _NodeStats:
+    __slots__ = ("count", "cumulative", "self_time", "active")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+        # Visits of this type currently on the stack, so recursion into the
+        # same node type isn't counted twice in the cumulative time.
+        self.active = 0
+
+
+class Profiler:
+    """
+    Collects what `plox --profile` reports: wall time per pipeline phase,
+    token and node counts, and per node type the number of executions and
+    the time spent in the tree-walking `Interpreter`'s visitors.
+
+    The visitors are timed by shadowing them with wrappers on the one
+    interpreter instance being profiled, so nothing is instrumented unless a
+    profile was asked for.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.parsed_nodes: Dict[str, int] = {}
+        self.program_nodes: Dict[str, int] = {}
+        self.nodes: Dict[str, _NodeStats] = {}
+        # Time spent in nested visits, per visit on the stack.
+        self._children: List[float] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def instrument(self, interpreter):
+        """Times every `visit_*` method of `interpreter`."""
+        for method_name, node_name in VISITORS.items():
+            method = getattr(interpreter, method_name, None)
+            if method is not None:
+                stats = self.nodes.setdefault(node_name, _NodeStats())
+                setattr(interpreter, method_name, self._timed(method, stats))
+
+    def _timed(self, method, stats: _NodeStats):
+        clock = time.perf_counter
+        children = self._children
+
+        def timed(node):
+            stats.count += 1
+            stats.active += 1
+            children.append(0.0)
+            start = clock()
+            try:
+                return method(node)
+            finally:
+                elapsed = clock() - start
+                nested = children.pop()
+                stats.active -= 1
+                stats.self_time += elapsed - nested
+                if not stats.active:
+                    stats.cumulative += elapsed
+                if children:
+                    children[-1] += elapsed
+
+        return timed
+
+    def report(self, file=sys.stderr):
+        print("== plox profile ==", file=file)
+        for name, seconds in self.phases.items():
+            print(f"{name + ' time':<20}{seconds * 1000:>12.3f} ms", file=file)
+        for name, count in self.counts.items():
+            print(f"{name:<20}{count:>12}", file=file)
+        if self.parsed_nodes:
+            print(f"{'nodes parsed':<20}{sum(self.parsed_nodes.values()):>12}", file=file)
+        if self.program_nodes:
+            print(f"{'nodes to execute':<20}{sum(self.program_nodes.values()):>12}", file=file)
+
+        executed = [(name, stats) for name, stats in self.nodes.items() if stats.count]
+        if not executed:
+            return
+        executed.sort(key=lambda item: item[1].self_time, reverse=True)
+        print(f"\n{'node':<12}{'in tree':>10}{'executions':>12}"
+              f"{'cumulative ms':>16}{'self ms':>12}", file=file)
+        for name, stats in executed:
+            print(f"{name:<12}{self.program_nodes.get(name, 0):>10}{stats.count:>12}"
+                  f"{stats.cumulative * 1000:>16.3f}{stats.self_time * 1000:>12.3f}",
+                  file=file)
@@ -0,0 +1,83 @@
+import io
+from typing import Dict, List, Mapping, TextIO, Tuple
+from context import RunContext
+from engines import ENGINES
+from error import CompileError, Error
+from optimizer import Optimizer
+from output import OutputSink
+from parser import Parser
+from resolver import Resolver
+from scanner import Scanner
+from stmt import Stmt
+from _token import Token
+
+
+def _lox_value(name: str, value: object) -> object:
+    if value is None or isinstance(value, (bool, str, float)):
+        return value
+    if isinstance(value, int):
+        # Lox has a single number type.
+        return float(value)
+    raise TypeError(f"global '{name}' has no Lox equivalent: {value!r}")
+
+
+class Program:
+    """
+    A Lox program that has been scanned, parsed, resolved and optimized,
+    ready to be run any number of times. Build one with `compile`.
+
+    The program is compiled for its engine once, here: the bytecode chunk,
+    the transpiled function, or the arena is shared by every run. Everything
+    a run changes (globals, error state, output) lives in the `RunContext`
+    that `run` creates for it.
+    """
+
+    def __init__(self, statements: List[Stmt], locals: Dict[Token, Tuple[int, int]],
+                 engine: str = "tree") -> None:
+        self.statements = statements
+        self._engine = ENGINES[engine]
+        compiler = self._engine()
+        for name, (depth, slot) in locals.items():
+            compiler.resolve(name, depth, slot)
+        self._prepared = compiler.prepare(statements)
+
+    def run(self, globals: Mapping[str, object] | None = None,
+            output: OutputSink | TextIO | None = None) -> RunContext:
+        """
+        Runs the program with `globals` predefined, printing to `output`: an
+        `OutputSink`, a text stream, or by default the process's stdout.
+        Runtime errors are reported to `output` like the CLI does.
+
+        Returns the run's context, whose `globals` hold the final global
+        bindings and whose `errors` tell whether there was a runtime error.
+        """
+        if output is not None and not isinstance(output, OutputSink):
+            output = OutputSink(stream=output)
+        context = RunContext(output)
+        for name, value in (globals or {}).items():
+            context.globals.define(name, _lox_value(name, value))
+
+        self._engine(context).execute(self._prepared)
+        context.output.flush()
+        return context
+
+
+def compile(source: str, optimize: bool = True, engine: str = "tree") -> Program:
+    """
+    Scans, parses, resolves and (unless told not to) optimizes `source`
+    into a `Program` that runs on `engine`. Raises `CompileError`, carrying
+    the diagnostics `plox` would have printed, if the source has errors.
+    """
+    diagnostics = io.StringIO()
+    errors = Error(OutputSink(stream=diagnostics))
+
+    statements = Parser(Scanner(source, errors).scan_tokens(), errors).parse()
+    if not errors.had_error:
+        resolver = Resolver(errors=errors)
+        resolver.resolve(statements)
+    if errors.had_error:
+        raise CompileError(diagnostics.getvalue())
+
+    if optimize:
+        statements = Optimizer().optimize(statements)
+    return Program(statements, resolver.locals, engine)
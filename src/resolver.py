@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+from error import Error
+from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from _token import Token
+
+
+@dataclass
+class _Local:
+    slot: int
+    defined: bool = False
+
+
+class Resolver:
+    """
+    Static pass run between parsing and interpreting. Works out, once, how
+    many scopes away each local variable lives and which slot it occupies,
+    and hands that to the interpreter. Globals are left unresolved and stay
+    dynamically looked up by name.
+    """
+
+    def __init__(self, interpreter=None, errors: Error | None = None) -> None:
+        self._interpreter = interpreter
+        self._errors = errors if errors is not None else Error()
+        self._scopes: List[Dict[str, _Local]] = []
+        # Everything handed to the interpreter, for consumers that need the
+        # resolution without one (e.g. the program cache, or `Program`).
+        self.locals: Dict[Token, Tuple[int, int]] = {}
+
+    def resolve(self, statements: List[Stmt]):
+        for statement in statements:
+            self._resolve_stmt(statement)
+
+    def _resolve_stmt(self, stmt: Stmt):
+        stmt.accept(self)
+
+    def _resolve_expr(self, expr: Expr):
+        expr.accept(self)
+
+    def _begin_scope(self):
+        self._scopes.append({})
+
+    def _end_scope(self):
+        self._scopes.pop()
+
+    def _declare(self, name: Token):
+        if not self._scopes:
+            return
+        scope = self._scopes[-1]
+        if name.lexeme in scope:
+            self._errors.parse_error(
+                name, "Already a variable with this name in this scope.")
+        scope[name.lexeme] = _Local(len(scope))
+
+    def _define(self, name: Token):
+        if not self._scopes:
+            return
+        local = self._scopes[-1][name.lexeme]
+        local.defined = True
+        self._record(name, 0, local.slot)
+
+    def _resolve_local(self, name: Token):
+        for depth, scope in enumerate(reversed(self._scopes)):
+            local = scope.get(name.lexeme)
+            if local is not None:
+                self._record(name, depth, local.slot)
+                return
+        # Not found in any block: assume it is global.
+
+    def _record(self, name: Token, depth: int, slot: int):
+        self.locals[name] = (depth, slot)
+        if self._interpreter is not None:
+            self._interpreter.resolve(name, depth, slot)
+
+    def visit_block_stmt(self, stmt: Block):
+        self._begin_scope()
+        self.resolve(stmt.statements)
+        self._end_scope()
+
+    def visit_var_stmt(self, stmt: Var):
+        self._declare(stmt.name)
+        if stmt.initializer is not None:
+            self._resolve_expr(stmt.initializer)
+        self._define(stmt.name)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._resolve_expr(stmt.expression)
+
+    def visit_if_stmt(self, stmt: If):
+        self._resolve_expr(stmt.condition)
+        self._resolve_stmt(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self._resolve_stmt(stmt.else_branch)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._resolve_expr(stmt.expression)
+
+    def visit_while_stmt(self, stmt: While):
+        self._resolve_expr(stmt.condition)
+        self._resolve_stmt(stmt.body)
+
+    def visit_variable_expr(self, expr: Variable):
+        if self._scopes:
+            local = self._scopes[-1].get(expr.name.lexeme)
+            if local is not None and not local.defined:
+                self._errors.parse_error(
+                    expr.name, "Can't read local variable in its own initializer.")
+        self._resolve_local(expr.name)
+
+    def visit_assign_expr(self, expr: Assign):
+        self._resolve_expr(expr.value)
+        self._resolve_local(expr.name)
+
+    def visit_binary_expr(self, expr: Binary):
+        self._resolve_expr(expr.left)
+        self._resolve_expr(expr.right)
+
+    def visit_grouping_expr(self, expr: Grouping):
+        self._resolve_expr(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal):
+        pass
+
+    def visit_logical_expr(self, expr: Logical):
+        self._resolve_expr(expr.left)
+        self._resolve_expr(expr.right)
+
+    def visit_unary_expr(self, expr: Unary):
+        self._resolve_expr(expr.right)
@@ -0,0 +1,116 @@
+import sys
+import threading
+import weakref
+from collections import Counter
+from dataclasses import fields
+from typing import Dict, List, Tuple
+from expr import Expr
+from interpreter import Interpreter
+from stmt import Stmt
+from _token import Token
+
+_EXECUTE = Interpreter._execute.__code__
+
+
+def statement_line(stmt: Stmt) -> int | None:
+    """The line of the first token in `stmt`, or None if it has none."""
+    pending: List[object] = [stmt]
+    while pending:
+        node = pending.pop()
+        if isinstance(node, Token):
+            return node.line
+        if isinstance(node, list):
+            pending.extend(reversed(node))
+        elif isinstance(node, (Expr, Stmt)):
+            pending.extend(reversed([getattr(node, field.name) for field in fields(node)]))
+    return None
+
+
+class Sampler:
+    """
+    Sampling profiler for the tree-walking `Interpreter`. A background thread
+    wakes up every `interval` seconds, looks at the interpreting thread's
+    Python stack and records the Lox statements being executed there: the
+    current one and every enclosing block, `if` and loop.
+
+    Nothing in the interpreter is instrumented; the cost is one stack walk
+    per sample, paid by the sampling thread.
+    """
+
+    def __init__(self, interval: float = 0.005) -> None:
+        self.interval = interval
+        # Collapsed stack (outermost first) -> number of samples.
+        self.stacks: Counter[Tuple[str, ...]] = Counter()
+        # Line -> samples with that line as the innermost statement.
+        self.lines: Counter[int | None] = Counter()
+        self.samples = 0
+        # id of a statement -> (a weak reference to it, its label).
+        self._labels: Dict[int, Tuple[weakref.ref, Tuple[str, int | None]]] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target = 0
+
+    def start(self):
+        self._target = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="plox-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._sample(frame)
+
+    def _label(self, stmt: Stmt) -> Tuple[str, int | None]:
+        # `--stream` frees statements once they have run and their ids get
+        # reused, so an entry only counts if it still refers to `stmt`.
+        entry = self._labels.get(id(stmt))
+        if entry is not None and entry[0]() is stmt:
+            return entry[1]
+        line = statement_line(stmt)
+        name = type(stmt).__name__.lower()
+        label = (name if line is None else f"{name}:{line}", line)
+        self._labels[id(stmt)] = (weakref.ref(stmt), label)
+        return label
+
+    def _sample(self, frame):
+        stack = []
+        while frame is not None:
+            if frame.f_code is _EXECUTE:
+                stmt = frame.f_locals.get("stmt")
+                if stmt is not None:
+                    stack.append(self._label(stmt))
+            frame = frame.f_back
+        if not stack:
+            return
+        stack.reverse()
+        self.samples += 1
+        self.stacks[tuple(label for label, _ in stack)] += 1
+        self.lines[stack[-1][1]] += 1
+
+    def write_collapsed(self, file):
+        """Writes `frame;frame;frame count` lines, as read by flamegraph.pl."""
+        for stack, count in sorted(self.stacks.items()):
+            print(";".join(("main",) + stack), count, file=file)
+
+    def report(self, file=sys.stderr, limit: int = 20):
+        print(f"== plox samples: {self.samples} every {self.interval * 1000:g} ms ==",
+              file=file)
+        print(f"{'line':>8}{'samples':>10}{'share':>9}", file=file)
+        for line, count in self.lines.most_common(limit):
+            print(f"{'?' if line is None else line:>8}{count:>10}"
+                  f"{count / self.samples:>9.1%}", file=file)
@@ -1,25 +1,204 @@
-from typing import List
+import re
+from array import array
+from collections import deque
+from typing import Callable, Iterator, List
 from _token import Token
 from error import Error
+from token_buffer import ByteTokenBuffer, TokenBuffer
 from utils.strings import is_alnum
 from token_type import TokenType as T, KEYWORDS_DICT
 
+# Master pattern for the ASCII fast path. Each match skips the blanks in
+# front of it (the lookahead/backreference pair makes that skip atomic) and
+# then matches exactly one alternative, so `finditer` walks the whole input
+# with no gaps; only trailing blanks at the very end go unmatched. The
+# alternatives mirror the branches of `Scanner.scan_token`.
+_TOKEN_PATTERN = re.compile(r"""
+    (?=([ \t\r]*))\1
+(?: (?P<newline>\n[ \t\r\n]*)
+  | (?P<identifier>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<operator>!=|==|<=|>=|[(){},.\-+;*!=<>])
+  | (?P<number>[0-9]+(?:\.[0-9]+)?)
+  | (?P<comment>//[^\n]*)
+  | (?P<slash>/)
+  | (?P<string>"[^"]*")
+  | (?P<unterminated>"[^"]*)
+  | (?P<unexpected>.))
+""", re.VERBOSE | re.DOTALL)
+
+# The same, for scanning bytes in place.
+_BYTE_TOKEN_PATTERN = re.compile(_TOKEN_PATTERN.pattern.encode(), re.VERBOSE | re.DOTALL)
+_NEWLINE = re.compile(b"\n")
+# Scripts `ByteScanner` can't take: the Unicode rules are per character, and
+# text-mode reads turn carriage returns into newlines.
+_NOT_PLAIN_ASCII = re.compile(b"[\x80-\xff\r]")
+
+_OPERATORS = {
+    '(': T.LEFT_PAREN,
+    ')': T.RIGHT_PAREN,
+    '{': T.LEFT_BRACE,
+    '}': T.RIGHT_BRACE,
+    ',': T.COMMA,
+    '.': T.DOT,
+    '-': T.MINUS,
+    '+': T.PLUS,
+    ';': T.SEMICOLON,
+    '*': T.STAR,
+    # The master pattern matches `/` on its own, after comments, but the
+    # other scanners look it up here.
+    '/': T.SLASH,
+    '!': T.BANG,
+    '!=': T.BANG_EQUAL,
+    '=': T.EQUAL,
+    '==': T.EQUAL_EQUAL,
+    '<': T.LESS,
+    '<=': T.LESS_EQUAL,
+    '>': T.GREATER,
+    '>=': T.GREATER_EQUAL,
+}
+
+
+def _lex(source, pattern: re.Pattern, keywords: dict, operators: dict, newline,
+         errors: Error, line: int, make: Callable) -> Iterator:
+    """
+    The master-pattern loop behind every fast path, for `str` or `bytes`
+    sources (with the matching pattern, tables and newline). Yields
+    `make(type, match, group, line)` for each token, reports scan errors as
+    it reaches them, and returns the line it ended on.
+    """
+    identifier = T.IDENTIFIER
+    for match in pattern.finditer(source):
+        kind = match.lastgroup
+        group = match.lastindex
+        if kind == "newline":
+            line += match.group(group).count(newline)
+        elif kind == "identifier":
+            yield make(keywords.get(match.group(group), identifier), match, group, line)
+        elif kind == "operator":
+            yield make(operators[match.group(group)], match, group, line)
+        elif kind == "number":
+            yield make(T.NUMBER, match, group, line)
+        elif kind == "string":
+            # Like `Scanner._string`, the token gets the line the string ends on.
+            line += match.group(group).count(newline)
+            yield make(T.STRING, match, group, line)
+        elif kind == "slash":
+            yield make(T.SLASH, match, group, line)
+        elif kind == "unterminated":
+            line += match.group(group).count(newline)
+            errors.error(line, "Unterminated string")
+        elif kind == "unexpected":
+            errors.error(line, "Unexpected character.")
+        # Comments produce nothing.
+    return line
+
+
+def _make_token(type: T, match: re.Match, group: int, line: int) -> Token:
+    text = match.group(group)
+    if type is T.NUMBER:
+        return Token(type, text, float(text), line)
+    if type is T.STRING:
+        return Token(type, text, text[1:-1], line)
+    return Token(type, text, None, line)
+
 
 class Scanner:
-    def __init__(self, source: str) -> None:
+    def __init__(self, source: str, errors: Error | None = None, line: int = 1) -> None:
+        self._errors = errors if errors is not None else Error()
         self._start = 0
         self._current = 0
-        self._line = 1
+        # Line `source` starts on, for scanning part of a larger file.
+        self._line = line
         self._source = source
         self._tokens: List[Token] = []
+        # When set, tokens are recorded here instead of in `_tokens`.
+        self._buffer: TokenBuffer | None = None
 
     def scan_tokens(self) -> List[Token]:
+        self._tokens = list(self.iter_tokens())
+        return self._tokens
+
+    def scan_vectorized(self, compact: bool = False) -> List[Token] | TokenBuffer:
+        """
+        Like `scan_tokens`, or `scan_buffer` if `compact`, but finds the
+        tokens with the NumPy pre-pass in `vector_scanner`, which pays off on
+        inputs of megabytes. Falls back to the regular scan without NumPy or
+        for non-ASCII sources.
+        """
+        # Imported here: `vector_scanner` shares this module's tables.
+        import vector_scanner
+        if compact:
+            buffer = TokenBuffer(self._source)
+            if not vector_scanner.fill(self._source, buffer, self._errors):
+                return self.scan_buffer()
+            end = len(self._source)
+            buffer.append(T.EOF, end, end)
+            return buffer
+
+        tokens = vector_scanner.scan(self._source, self._errors, self._line)
+        if tokens is None:
+            return self.scan_tokens()
+        self._current = len(self._source)
+        self._line = tokens[-1].line
+        self._tokens = tokens
+        return tokens
+
+    def iter_tokens(self) -> Iterator[Token]:
+        """
+        Yields tokens as they are scanned, ending with EOF. Errors are
+        reported when the offending token would have been produced.
+        """
+        if self._source.isascii():
+            yield from self._iter_ascii()
+            return
+
+        # Unicode letters and digits follow `str.isalpha`/`str.isdigit`,
+        # which the fast path does not replicate.
+        # `scan_token` adds to `_tokens`; give it a fresh list to stage in,
+        # so tokens a caller already holds are never yielded again.
+        pending = self._tokens = []
         while not self._is_at_end():
             self._start = self._current
             self.scan_token()
+            if pending:
+                yield from pending
+                pending.clear()
 
-        self._tokens.append(Token(T.EOF, "", None, self._line))
-        return self._tokens
+        yield Token(T.EOF, "", None, self._line)
+
+    def scan_buffer(self) -> TokenBuffer:
+        """
+        Like `scan_tokens`, but records tokens in a compact `TokenBuffer`
+        instead of building a `Token` object for each one.
+        """
+        buffer = TokenBuffer(self._source)
+        if self._source.isascii():
+            self._fill_ascii(buffer)
+        else:
+            self._buffer = buffer
+            while not self._is_at_end():
+                self._start = self._current
+                self.scan_token()
+            self._buffer = None
+
+        end = len(self._source)
+        buffer.append(T.EOF, end, end)
+        return buffer
+
+    def _fill_ascii(self, buffer: TokenBuffer):
+        # Only the tokens' spans are wanted; drain the loop without keeping
+        # what it yields.
+        deque(_lex(self._source, _TOKEN_PATTERN, KEYWORDS_DICT, _OPERATORS, '\n',
+                   self._errors, self._line, buffer.append_match), maxlen=0)
+        self._current = len(self._source)
+        self._line += self._source.count('\n')
+
+    def _iter_ascii(self) -> Iterator[Token]:
+        line = yield from _lex(self._source, _TOKEN_PATTERN, KEYWORDS_DICT, _OPERATORS, '\n',
+                               self._errors, self._line, _make_token)
+        self._current = len(self._source)
+        self._line = line
+        yield Token(T.EOF, "", None, line)
 
     def _is_at_end(self) -> bool:
         return self._current >= len(self._source)
@@ -33,6 +212,9 @@ class Scanner:
         self._add_token_literal(type, None)
 
     def _add_token_literal(self, type: T, literal: object) -> None:
+        if self._buffer is not None:
+            self._buffer.append(type, self._start, self._current)
+            return
         text = self._source[self._start:self._current]
         self._tokens.append(Token(type, text, literal, self._line))
 
@@ -60,7 +242,7 @@ class Scanner:
                 self._line += 1
             self._advance()
         if self._is_at_end():
-            Error.error(self._line, "Unterminated string")
+            self._errors.error(self._line, "Unterminated string")
             return
         # The closing `"`.
         self._advance()
@@ -143,4 +325,36 @@ class Scanner:
             case c if c.isalpha():
                 self._identifier()
             case _:
-                Error.error(self._line, "Unexpected character.")
+                self._errors.error(self._line, "Unexpected character.")
+
+
+_BYTE_KEYWORDS = {keyword.encode(): type for keyword, type in KEYWORDS_DICT.items()}
+_BYTE_OPERATORS = {operator.encode(): type for operator, type in _OPERATORS.items()}
+
+
+class ByteScanner:
+    """
+    Scans a script held as bytes, such as a memory-mapped file, without
+    decoding it: tokens go into a `ByteTokenBuffer` as offsets, and error
+    lines come from an index of the newlines. Only takes sources `accepts`
+    says yes to; the tokens are the same `Scanner.scan_buffer` would give
+    for the decoded text.
+    """
+
+    def __init__(self, source, errors: Error | None = None) -> None:
+        self._errors = errors if errors is not None else Error()
+        self._source = source
+
+    @staticmethod
+    def accepts(source) -> bool:
+        return _NOT_PLAIN_ASCII.search(source) is None
+
+    def scan_buffer(self) -> ByteTokenBuffer:
+        source = self._source
+        newlines = array('q', (match.start() for match in _NEWLINE.finditer(source)))
+        buffer = ByteTokenBuffer(source, newlines)
+        deque(_lex(source, _BYTE_TOKEN_PATTERN, _BYTE_KEYWORDS, _BYTE_OPERATORS, b'\n',
+                   self._errors, 1, buffer.append_match), maxlen=0)
+        end = len(source)
+        buffer.append(T.EOF, end, end)
+        return buffer
@@ -16,7 +16,7 @@ class Block(Stmt):
     statements: typing.List[Stmt]
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_block_stmt(self)
 
 
 @dataclass(frozen=True)
@@ -24,7 +24,7 @@ class Expression(Stmt):
     expression: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_expression_stmt(self)
 
 
 @dataclass(frozen=True)
@@ -34,7 +34,7 @@ class If(Stmt):
     else_branch: Stmt
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_if_stmt(self)
 
 
 @dataclass(frozen=True)
@@ -42,7 +42,7 @@ class Print(Stmt):
     expression: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_print_stmt(self)
 
 
 @dataclass(frozen=True)
@@ -51,7 +51,7 @@ class Var(Stmt):
     initializer: Expr
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_var_stmt(self)
 
 
 @dataclass(frozen=True)
@@ -60,4 +60,4 @@ class While(Stmt):
     body: Stmt
 
     def accept(self, visitor):
-        return visitor.visit(self)
+        return visitor.visit_while_stmt(self)
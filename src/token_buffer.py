@@ -0,0 +1,146 @@
+import re
+from array import array
+from bisect import bisect_right
+from typing import Sequence
+from _token import Token
+from token_type import TokenType
+
+# Token types are stored as their index in this list.
+_TYPES = list(TokenType)
+TYPE_CODES = {type: code for code, type in enumerate(_TYPES)}
+
+_NEWLINE = re.compile("\n")
+
+
+class BufferedToken(Token):
+    """
+    A `Token` view onto one entry of a `TokenBuffer`. The lexeme, literal and
+    line are only worked out when something asks for them.
+    """
+    __slots__ = ("_buffer", "_index", "_lexeme")
+
+    def __init__(self, buffer: "TokenBuffer", index: int, type: TokenType) -> None:
+        self.type = type
+        self._buffer = buffer
+        self._index = index
+        self._lexeme = None
+
+    @property
+    def lexeme(self) -> str:
+        if self._lexeme is None:
+            self._lexeme = self._buffer.lexeme_at(self._index)
+        return self._lexeme
+
+    @property
+    def literal(self) -> object:
+        if self.type == TokenType.NUMBER:
+            return float(self.lexeme)
+        if self.type == TokenType.STRING:
+            # Trim the surrounding quotes.
+            return self.lexeme[1:-1]
+        return None
+
+    @property
+    def line(self) -> int:
+        return self._buffer.line_at(self._index)
+
+
+class TokenBuffer(Sequence[Token]):
+    """
+    Compact token list. Each token is a type code, a start offset and a
+    length in parallel arrays, a few bytes per token instead of a full
+    `Token` object with its own lexeme string.
+
+    Indexing returns a `BufferedToken`, so the `Parser` and `Error` can use
+    the buffer like a `List[Token]`.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        offset_code = 'I' if len(source) < 2 ** 32 else 'q'
+        self._types = array('B')
+        self._starts = array(offset_code)
+        self._lengths = array(offset_code)
+        self._newlines: array | None = None
+        # The parser keeps asking for the same couple of tokens; hand back
+        # the same objects instead of building new views each time.
+        self._cache_index = -1
+        self._cache_token: BufferedToken | None = None
+        self._previous_index = -1
+        self._previous_token: BufferedToken | None = None
+
+    def append(self, type: TokenType, start: int, end: int):
+        self._types.append(TYPE_CODES[type])
+        self._starts.append(start)
+        self._lengths.append(end - start)
+
+    def append_match(self, type: TokenType, match: re.Match, group: int, line: int):
+        """`append` for the span of a regex group; a token maker for the scanner's loop."""
+        start = match.start(group)
+        self._types.append(TYPE_CODES[type])
+        self._starts.append(start)
+        self._lengths.append(match.end(group) - start)
+
+    def extend(self, codes: Sequence[int], starts: Sequence[int], lengths: Sequence[int]):
+        """Appends many tokens at once, given as type codes, offsets and lengths."""
+        self._types.extend(codes)
+        self._starts.extend(starts)
+        self._lengths.extend(lengths)
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def __getitem__(self, index: int) -> BufferedToken:
+        if index < 0:
+            index += len(self._types)
+        if index == self._cache_index:
+            return self._cache_token
+        if index == self._previous_index:
+            return self._previous_token
+
+        token = BufferedToken(self, index, _TYPES[self._types[index]])
+        self._previous_index = self._cache_index
+        self._previous_token = self._cache_token
+        self._cache_index = index
+        self._cache_token = token
+        return token
+
+    def type_at(self, index: int) -> TokenType:
+        return _TYPES[self._types[index]]
+
+    def lexeme_at(self, index: int) -> str:
+        start = self._starts[index]
+        return self.source[start:start + self._lengths[index]]
+
+    def line_at(self, index: int) -> int:
+        if self._newlines is None:
+            self._newlines = array(
+                'q', (match.start() for match in _NEWLINE.finditer(self.source)))
+        # A token is on the line of its last character, which is where the
+        # scanner's line counter stood when it was produced.
+        end = self._starts[index] + self._lengths[index] - 1
+        return bisect_right(self._newlines, end) + 1
+
+    def nbytes(self) -> int:
+        """Memory used by the token columns and the newline index."""
+        total = 0
+        for column in (self._types, self._starts, self._lengths, self._newlines):
+            if column is not None:
+                total += column.itemsize * len(column)
+        return total
+
+
+class ByteTokenBuffer(TokenBuffer):
+    """
+    A `TokenBuffer` over ASCII bytes, such as a memory-mapped file, with the
+    offsets of its newlines worked out up front. Lexemes are decoded when
+    something asks for them.
+    """
+
+    def __init__(self, source, newlines: array) -> None:
+        super().__init__(source)
+        self._newlines = newlines
+
+    def lexeme_at(self, index: int) -> str:
+        start = self._starts[index]
+        return self.source[start:start + self._lengths[index]].decode("ascii")
@@ -0,0 +1,334 @@
+import math
+from typing import Callable, Dict, List, Tuple
+from closure_compiler import ClosureCompiler
+from context import RunContext
+from error import LoxRuntimeError
+from expr import Assign, Binary, Expr, Grouping, Literal, Logical, Unary, Variable
+from interpreter import check_number_operands
+from stmt import Block, Expression, If, Print, Stmt, Var, While
+from _token import Token
+from token_type import TokenType as T
+from utils.equality import is_equal
+from utils.rope import concat, is_string
+from utils.strings import stringify
+
+INDENT = "    "
+
+_COMPARISON_OPS = {T.GREATER, T.GREATER_EQUAL, T.LESS, T.LESS_EQUAL}
+
+_NUMBER_OPS = {
+    T.GREATER: ">",
+    T.GREATER_EQUAL: ">=",
+    T.LESS: "<",
+    T.LESS_EQUAL: "<=",
+    T.MINUS: "-",
+    T.SLASH: "/",
+    T.STAR: "*",
+}
+
+# Names the generated function receives as arguments, so they are fast
+# locals in the compiled code.
+_RUNTIME = ("_g", "_t", "_k", "is_equal", "is_string", "concat", "stringify",
+            "_check", "_add_error", "_undefined", "_write")
+
+# A transpiled program: the generated function (None if CPython refused the
+# source), its token and constant tables, and the fallback engine's program.
+Prepared = Tuple[Callable | None, List[Token], List[object], object]
+
+
+def _add_error(token: Token):
+    raise LoxRuntimeError(token, "Operands must be two numbers or two strings.")
+
+
+def _undefined(token: Token):
+    raise LoxRuntimeError(token, f"Undefined variable '{token.lexeme}'.")
+
+
+def _has_assign(expr: Expr) -> bool:
+    if isinstance(expr, Assign):
+        return True
+    if isinstance(expr, (Binary, Logical)):
+        return _has_assign(expr.left) or _has_assign(expr.right)
+    if isinstance(expr, Unary):
+        return _has_assign(expr.right)
+    if isinstance(expr, Grouping):
+        return _has_assign(expr.expression)
+    return False
+
+
+class Transpiler:
+    """
+    Engine that translates the program into Python source for a single
+    function, `compile()`s it, and lets CPython's own eval loop run it.
+
+    Every Lox expression is flattened into simple Python statements over
+    temporaries, so evaluation order, short-circuiting and the point at which
+    runtime errors are raised all follow `Interpreter`. Lox locals become
+    Python locals, renamed per declaration; globals live in the same
+    name-keyed `Environment` the other engines use.
+
+    Programs CPython refuses to compile (e.g. loops nested deeper than its
+    static block limit) run on the `ClosureCompiler` instead.
+    """
+
+    def __init__(self, context: RunContext | None = None) -> None:
+        self._context = context if context is not None else RunContext()
+        self._fallback = ClosureCompiler(self._context)
+        self._globals = self._context.globals
+        self._output = self._context.output
+
+    def resolve(self, name: Token, depth: int, slot: int):
+        self._fallback.resolve(name, depth, slot)
+
+    def forget_locals(self):
+        self._fallback.forget_locals()
+
+    def transpile(self, statements: List[Stmt]) -> Tuple[str, List[Token], List[object]]:
+        """Returns the Python source and the token and constant tables it uses."""
+        self._lines: List[str] = []
+        self._depth = 1
+        self._tokens: List[Token] = []
+        self._constants: List[object] = []
+        # Value of every atom that is a Python literal, keyed by its spelling.
+        self._literals: Dict[str, object] = {}
+        self._temp_count = 0
+        self._local_count = 0
+        # Lexeme and Python name of every live local, innermost last.
+        self._locals: List[Tuple[str, str]] = []
+        self._scope_sizes: List[int] = []
+
+        for statement in statements:
+            self._statement(statement)
+        body = self._lines or [INDENT + "pass"]
+        header = f"def __lox_main({', '.join(_RUNTIME)}):"
+        return "\n".join([header, *body]) + "\n", self._tokens, self._constants
+
+    def prepare(self, statements: List[Stmt]) -> Prepared:
+        """
+        Compiles `statements` into the function `execute` calls, with the
+        token and constant tables it takes. If CPython refuses the source,
+        the function is None and the last item is what the fallback engine
+        runs instead.
+        """
+        source, tokens, constants = self.transpile(statements)
+        try:
+            code = compile(source, "<lox>", "exec")
+        except (SyntaxError, RecursionError, MemoryError):
+            return None, tokens, constants, self._fallback.prepare(statements)
+
+        namespace: Dict[str, object] = {}
+        exec(code, namespace)
+        return namespace["__lox_main"], tokens, constants, None
+
+    def execute(self, prepared: Prepared):
+        main, tokens, constants, fallback = prepared
+        if main is None:
+            self._fallback.execute(fallback)
+            return
+        try:
+            main(self._globals.values, tokens, constants,
+                 is_equal, is_string, concat, stringify,
+                 check_number_operands, _add_error, _undefined,
+                 self._output.write_line)
+        except LoxRuntimeError as err:
+            self._context.errors.runtime_error(err)
+
+    def interpret(self, statements: List[Stmt]):
+        self.execute(self.prepare(statements))
+
+    def _emit(self, line: str):
+        self._lines.append(INDENT * self._depth + line)
+
+    def _temp(self) -> str:
+        self._temp_count += 1
+        return f"_{self._temp_count}"
+
+    def _token(self, token: Token) -> str:
+        self._tokens.append(token)
+        return f"_t[{len(self._tokens) - 1}]"
+
+    def _resolve_local(self, name: Token):
+        for lexeme, python_name in reversed(self._locals):
+            if lexeme == name.lexeme:
+                return python_name
+        return None
+
+    def _statement(self, stmt: Stmt):
+        stmt.accept(self)
+
+    def _expression(self, expr: Expr) -> str:
+        """
+        Emits the statements that evaluate `expr` and returns a Python atom
+        (a name or a literal) holding its value.
+        """
+        return expr.accept(self)
+
+    def _truthy(self, atom: str) -> str:
+        # Same rule as `utils.truthy.is_truthy`: only nil and false are falsey.
+        # Literals are decided here, since CPython warns about `is` on them.
+        if atom in self._literals:
+            value = self._literals[atom]
+            return repr(value is not None and value is not False)
+        return f"({atom} is not None and {atom} is not False)"
+
+    def _condition(self, expr: Expr) -> str:
+        atom = self._expression(expr)
+        if isinstance(expr, Binary) and expr.operator.type in _COMPARISON_OPS:
+            return atom
+        return self._truthy(atom)
+
+    def _spill(self, atom: str) -> str:
+        temp = self._temp()
+        self._emit(f"{temp} = {atom}")
+        return temp
+
+    def _check_numbers(self, operator: Token, *atoms: str):
+        # Number literals need no runtime check.
+        checked = [atom for atom in atoms
+                   if type(self._literals.get(atom)) is not float]
+        if not checked:
+            return
+        test = " or ".join(f"({atom}).__class__ is not float" for atom in checked)
+        self._emit(f"if {test}:")
+        self._emit(
+            f"{INDENT}_check({self._token(operator)}, {', '.join(atoms)})")
+
+    def visit_literal_expr(self, expr: Literal):
+        value = expr.value
+        if (isinstance(value, float) and math.isfinite(value)) or \
+                value is None or isinstance(value, (bool, str)):
+            atom = repr(value)
+            self._literals[atom] = value
+            return atom
+        self._constants.append(value)
+        return f"_k[{len(self._constants) - 1}]"
+
+    def visit_grouping_expr(self, expr: Grouping):
+        return self._expression(expr.expression)
+
+    def visit_unary_expr(self, expr: Unary):
+        right = self._expression(expr.right)
+        result = self._temp()
+        if expr.operator.type == T.BANG:
+            if right in self._literals:
+                self._emit(f"{result} = {self._truthy(right) == 'False'}")
+            else:
+                self._emit(f"{result} = {right} is None or {right} is False")
+        else:
+            self._check_numbers(expr.operator, right)
+            self._emit(f"{result} = -{right}")
+        return result
+
+    def visit_binary_expr(self, expr: Binary):
+        left = self._expression(expr.left)
+        if _has_assign(expr.right):
+            # Keep the left value from before the assignment runs.
+            left = self._spill(left)
+        right = self._expression(expr.right)
+        result = self._temp()
+
+        match expr.operator.type:
+            case T.EQUAL_EQUAL:
+                self._emit(f"{result} = is_equal({left}, {right})")
+            case T.BANG_EQUAL:
+                self._emit(f"{result} = not is_equal({left}, {right})")
+            case T.PLUS:
+                self._emit(
+                    f"if ({left}).__class__ is float and ({right}).__class__ is float:")
+                self._emit(f"{INDENT}{result} = {left} + {right}")
+                self._emit(
+                    f"elif is_string({left}) and is_string({right}):")
+                self._emit(f"{INDENT}{result} = concat({left}, {right})")
+                self._emit("else:")
+                self._emit(f"{INDENT}_add_error({self._token(expr.operator)})")
+            case _:
+                self._check_numbers(expr.operator, left, right)
+                op = _NUMBER_OPS[expr.operator.type]
+                self._emit(f"{result} = {left} {op} {right}")
+        return result
+
+    def visit_logical_expr(self, expr: Logical):
+        result = self._spill(self._expression(expr.left))
+        if expr.operator.type == T.OR:
+            self._emit(f"if not {self._truthy(result)}:")
+        else:
+            self._emit(f"if {self._truthy(result)}:")
+        self._depth += 1
+        self._emit(f"{result} = {self._expression(expr.right)}")
+        self._depth -= 1
+        return result
+
+    def visit_variable_expr(self, expr: Variable):
+        python_name = self._resolve_local(expr.name)
+        if python_name is not None:
+            return python_name
+        lexeme = repr(expr.name.lexeme)
+        result = self._temp()
+        self._emit(
+            f"{result} = _g[{lexeme}] if {lexeme} in _g else _undefined({self._token(expr.name)})")
+        return result
+
+    def visit_assign_expr(self, expr: Assign):
+        value = self._expression(expr.value)
+        python_name = self._resolve_local(expr.name)
+        if python_name is not None:
+            self._emit(f"{python_name} = {value}")
+            return python_name
+
+        lexeme = repr(expr.name.lexeme)
+        self._emit(f"if {lexeme} not in _g:")
+        self._emit(f"{INDENT}_undefined({self._token(expr.name)})")
+        self._emit(f"_g[{lexeme}] = {value}")
+        return value
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self._expression(stmt.expression)
+
+    def visit_print_stmt(self, stmt: Print):
+        self._emit(f"_write(stringify({self._expression(stmt.expression)}))")
+
+    def visit_var_stmt(self, stmt: Var):
+        value = "None"
+        if stmt.initializer is not None:
+            value = self._expression(stmt.initializer)
+
+        if self._scope_sizes:
+            self._local_count += 1
+            python_name = f"l{self._local_count}"
+            self._emit(f"{python_name} = {value}")
+            self._locals.append((stmt.name.lexeme, python_name))
+            self._scope_sizes[-1] += 1
+        else:
+            self._emit(f"_g[{stmt.name.lexeme!r}] = {value}")
+
+    def visit_block_stmt(self, stmt: Block):
+        # Scoping is handled by renaming, so blocks need no Python nesting.
+        self._scope_sizes.append(0)
+        for statement in stmt.statements:
+            self._statement(statement)
+        size = self._scope_sizes.pop()
+        if size:
+            del self._locals[-size:]
+
+    def _branch(self, stmt: Stmt):
+        self._depth += 1
+        mark = len(self._lines)
+        self._statement(stmt)
+        if len(self._lines) == mark:
+            self._emit("pass")
+        self._depth -= 1
+
+    def visit_if_stmt(self, stmt: If):
+        self._emit(f"if {self._condition(stmt.condition)}:")
+        self._branch(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self._emit("else:")
+            self._branch(stmt.else_branch)
+
+    def visit_while_stmt(self, stmt: While):
+        self._emit("while True:")
+        self._depth += 1
+        self._emit(f"if not {self._condition(stmt.condition)}:")
+        self._emit(f"{INDENT}break")
+        self._depth -= 1
+        self._branch(stmt.body)
@@ -1,9 +1,10 @@
 from typing import Any
+from utils.rope import flatten
 
 
 def is_equal(a: Any, b: Any) -> bool:
-    if a == None and b == None:
+    if a is None and b is None:
         return True
-    if a == None:
+    if a is None:
         return False
-    return a == b
+    return flatten(a) == flatten(b)
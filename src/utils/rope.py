@@ -0,0 +1,79 @@
+from typing import List
+
+# Results shorter than this are plain `str` concatenations; copying them is
+# cheaper than allocating a node.
+ROPE_THRESHOLD = 256
+
+
+class Rope:
+    """
+    A Lox string built by concatenation, kept as a binary tree of its two
+    halves so that `+` doesn't copy. The characters are only joined, once,
+    when something observes the value (see `flatten`); after that the node
+    holds the flat `str` and lets go of its children.
+    """
+    __slots__ = ("_left", "_right", "_length", "_flat")
+
+    def __init__(self, left: "str | Rope", right: "str | Rope") -> None:
+        self._left = left
+        self._right = right
+        self._length = len(left) + len(right)
+        self._flat: str | None = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def flatten(self) -> str:
+        if self._flat is None:
+            parts: List[str] = []
+            # Explicit stack: ropes built in a loop are as deep as the loop is long.
+            pending: List[str | Rope] = [self]
+            while pending:
+                node = pending.pop()
+                if node.__class__ is str:
+                    parts.append(node)
+                elif node._flat is not None:
+                    parts.append(node._flat)
+                else:
+                    pending.append(node._right)
+                    pending.append(node._left)
+            self._flat = "".join(parts)
+            self._left = self._right = None
+        return self._flat
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return f"Rope({self.flatten()!r})"
+
+    def __eq__(self, other: object) -> bool:
+        # Only another string can be equal, and only if it's as long; nothing
+        # else is worth joining the characters for.
+        if other.__class__ is not str and other.__class__ is not Rope:
+            return False
+        if len(other) != self._length:
+            return False
+        if other.__class__ is Rope:
+            other = other.flatten()
+        return self.flatten() == other
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+
+def is_string(value: object) -> bool:
+    return value.__class__ is str or value.__class__ is Rope
+
+
+def concat(left: "str | Rope", right: "str | Rope") -> "str | Rope":
+    """`left + right` for two Lox strings."""
+    if len(left) + len(right) < ROPE_THRESHOLD:
+        # Neither side can be a `Rope`; those are never this short.
+        return left + right
+    return Rope(left, right)
+
+
+def flatten(value: object) -> object:
+    """`value`, with a `Rope` replaced by its `str`."""
+    return value.flatten() if value.__class__ is Rope else value
@@ -1,4 +1,5 @@
 from typing import Any
+from utils.rope import Rope
 
 
 def is_alpha(val: str) -> bool:
@@ -10,9 +11,12 @@ def is_alnum(val: str) -> bool:
 
 
 def stringify(val: Any) -> str:
-    if val == None:
+    if val is None:
         return 'nil'
 
+    if isinstance(val, Rope):
+        return val.flatten()
+
     if isinstance(val, float):
         text = str(val)
         if text.endswith(".0"):
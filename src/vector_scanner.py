@@ -0,0 +1,305 @@
+"""
+Bulk scanning with NumPy, for large inputs. The source is classified a byte
+at a time in one vectorized pass, token boundaries are found with array
+operations, and Python code only runs once per token (to build the `Token`)
+and once per string or comment (to find where it ends).
+
+NumPy is optional: without it, `scan` returns None and callers use the
+regular `Scanner`.
+"""
+from bisect import bisect_left
+from itertools import repeat
+from dataclasses import dataclass
+from typing import List, Tuple
+from error import Error
+from _token import Token
+from scanner import _OPERATORS
+from token_buffer import TYPE_CODES, TokenBuffer
+from token_type import TokenType as T, KEYWORDS_DICT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Character classes.
+_SPACE = 0
+_NEWLINE = 1
+_DIGIT = 2
+_ALPHA = 3
+_UNDERSCORE = 4
+_SINGLE = 5   # ( ) { } , - + ; *
+_COMPARE = 6  # ! = < >, which may be followed by =
+_DOT = 7
+_SLASH = 8
+_QUOTE = 9
+_OTHER = 10
+
+
+def _class_table():
+    table = np.full(256, _OTHER, dtype=np.uint8)
+    for char in " \t\r":
+        table[ord(char)] = _SPACE
+    table[ord("\n")] = _NEWLINE
+    table[ord("0"):ord("9") + 1] = _DIGIT
+    table[ord("a"):ord("z") + 1] = _ALPHA
+    table[ord("A"):ord("Z") + 1] = _ALPHA
+    table[ord("_")] = _UNDERSCORE
+    for char in "(){},-+;*":
+        table[ord(char)] = _SINGLE
+    for char in "!=<>":
+        table[ord(char)] = _COMPARE
+    table[ord(".")] = _DOT
+    table[ord("/")] = _SLASH
+    table[ord('"')] = _QUOTE
+    return table
+
+
+def _operator_codes():
+    # Indexed by an operator's first byte times two, plus one for the
+    # two-character comparisons.
+    table = np.zeros(512, dtype=np.uint8)
+    for text, type in _OPERATORS.items():
+        table[ord(text[0]) * 2 + len(text) - 1] = TYPE_CODES[type]
+    return table
+
+
+_CLASSES = _class_table() if np is not None else None
+_OPERATOR_CODES = _operator_codes() if np is not None else None
+
+
+def _previous(mask):
+    """`mask` moved one place right: whether the previous position is set."""
+    shifted = np.zeros_like(mask)
+    shifted[1:] = mask[:-1]
+    return shifted
+
+
+def _next(mask):
+    shifted = np.zeros_like(mask)
+    shifted[:-1] = mask[1:]
+    return shifted
+
+
+def _run_starts(mask):
+    """For each position, where the run of set positions it belongs to starts."""
+    positions = np.arange(len(mask))
+    return np.maximum.accumulate(np.where(mask & ~_previous(mask), positions, 0))
+
+
+def _alternate(candidates, linked):
+    """
+    Of a chain of overlapping candidates, a greedy left-to-right scan takes
+    the first, skips the second, takes the third and so on. `linked` says
+    whether each candidate overlaps the one before it.
+    """
+    indexes = np.arange(len(candidates))
+    chain_starts = np.maximum.accumulate(np.where(linked, 0, indexes))
+    return candidates[(indexes - chain_starts) % 2 == 0]
+
+
+def _strings_and_comments(source: str, classes) -> Tuple[List[Tuple[int, int]], int | None, object]:
+    """
+    Finds string literals and comments, which hide whatever they contain
+    from the rest of the scan. Only the quotes and `//` pairs are visited.
+
+    Returns the strings as (start, end) pairs, where an unterminated string
+    starts (or None), and a mask of every position inside either.
+    """
+    size = len(classes)
+    slash = classes == _SLASH
+    quotes = np.flatnonzero(classes == _QUOTE).tolist()
+    comments = np.flatnonzero(slash[:-1] & slash[1:]).tolist()
+    strings = []
+    hidden = []
+    unterminated = None
+    position = 0
+    while True:
+        quote_index = bisect_left(quotes, position)
+        comment_index = bisect_left(comments, position)
+        quote = quotes[quote_index] if quote_index < len(quotes) else size
+        comment = comments[comment_index] if comment_index < len(comments) else size
+        if quote == comment == size:
+            break
+        if quote < comment:
+            if quote_index + 1 == len(quotes):
+                unterminated = quote
+                hidden.append((quote, size))
+                break
+            position = quotes[quote_index + 1] + 1
+            strings.append((quote, position))
+            hidden.append((quote, position))
+        else:
+            position = source.find("\n", comment)
+            if position < 0:
+                position = size
+            hidden.append((comment, position))
+
+    # Mark the hidden stretches through a running sum of +1/-1 at their ends.
+    marks = np.zeros(size + 1, dtype=np.int32)
+    if hidden:
+        bounds = np.array(hidden, dtype=np.int64)
+        np.add.at(marks, bounds[:, 0], 1)
+        np.add.at(marks, bounds[:, 1], -1)
+    return strings, unterminated, np.cumsum(marks[:-1]) > 0
+
+
+@dataclass
+class _Boundaries:
+    """Where each kind of token starts and ends, as arrays of offsets."""
+    data: object
+    newlines: object
+    last_line: int
+    identifier_starts: object
+    identifier_ends: object
+    number_starts: object
+    number_ends: object
+    string_starts: object
+    string_ends: object
+    operator_starts: object
+    operator_ends: object
+
+    def starts(self):
+        return np.concatenate((self.identifier_starts, self.number_starts,
+                               self.string_starts, self.operator_starts))
+
+
+def _boundaries(source: str, errors: Error, line: int) -> _Boundaries:
+    """Finds every token in `source`, reporting scan errors as it goes."""
+    data = np.frombuffer(source.encode("ascii"), dtype=np.uint8)
+    size = len(data)
+    classes = _CLASSES[data]
+    newlines = np.flatnonzero(classes == _NEWLINE)
+
+    strings, unterminated, hidden = _strings_and_comments(source, classes)
+    # Strings and comments separate tokens just as spaces do.
+    classes = np.where(hidden, _SPACE, classes)
+
+    # Identifiers: within a run of word characters, everything from the
+    # first letter on. Digits and underscores before it are numbers and
+    # unexpected characters.
+    alpha = classes == _ALPHA
+    word = alpha | (classes == _DIGIT) | (classes == _UNDERSCORE)
+    word_starts = _run_starts(word)
+    alphas = np.cumsum(alpha)
+    identifier = word & (alphas > alphas[word_starts] - alpha[word_starts])
+    identifier_starts = np.flatnonzero(identifier & ~_previous(identifier))
+    identifier_ends = np.flatnonzero(identifier & ~_next(identifier)) + 1
+
+    # Numbers: runs of digits outside identifiers, where a dot between two
+    # runs joins them if the first isn't already a fraction.
+    digit = (classes == _DIGIT) & ~identifier
+    digit_starts = _run_starts(digit)
+    dot = classes == _DOT
+    candidates = np.flatnonzero(dot & _previous(digit) & _next(classes == _DIGIT))
+    linked = np.zeros(len(candidates), dtype=bool)
+    if len(candidates):
+        linked[1:] = digit_starts[candidates[1:] - 1] - 1 == candidates[:-1]
+    decimal = np.zeros(size + 1, dtype=bool)
+    decimal[_alternate(candidates, linked)] = True
+
+    run_starts = np.flatnonzero(digit & ~_previous(digit))
+    run_ends = np.flatnonzero(digit & ~_next(digit)) + 1
+    fraction = np.zeros(len(run_starts), dtype=bool)
+    fraction[run_starts > 0] = decimal[run_starts[run_starts > 0] - 1]
+    continued = decimal[run_ends]
+    number_ends = run_ends.copy()
+    number_ends[:-1] = np.where(continued[:-1], run_ends[1:], run_ends[:-1])
+    number_starts = run_starts[~fraction]
+    number_ends = number_ends[~fraction]
+
+    # Operators: two-character comparisons, taken greedily, and everything
+    # else one character at a time.
+    compare = classes == _COMPARE
+    pairs = np.flatnonzero(compare & _next(compare & (data == ord("="))))
+    linked = np.zeros(len(pairs), dtype=bool)
+    linked[1:] = pairs[1:] - 1 == pairs[:-1]
+    pairs = _alternate(pairs, linked)
+    paired = np.zeros(size, dtype=bool)
+    paired[pairs] = True
+    paired[pairs + 1] = True
+    singles = np.flatnonzero(
+        (classes == _SINGLE) | (classes == _SLASH) | (dot & ~decimal[:size]) | (compare & ~paired))
+    operator_starts = np.concatenate((pairs, singles))
+    operator_ends = np.concatenate((pairs + 2, singles + 1))
+
+    unexpected = np.flatnonzero((classes == _OTHER) | ((classes == _UNDERSCORE) & ~identifier))
+    for position in (line + np.searchsorted(newlines, unexpected)).tolist():
+        errors.error(position, "Unexpected character.")
+    last_line = line + len(newlines)
+    if unterminated is not None:
+        errors.error(last_line, "Unterminated string")
+
+    string_bounds = np.array(strings, dtype=np.int64).reshape(-1, 2)
+    return _Boundaries(data, newlines, last_line, identifier_starts, identifier_ends,
+                       number_starts, number_ends, string_bounds[:, 0], string_bounds[:, 1],
+                       operator_starts, operator_ends)
+
+
+def scan(source: str, errors: Error, line: int = 1) -> List[Token] | None:
+    """
+    Scans `source` like `Scanner.scan_tokens`, with the same tokens and
+    errors. Returns None, having done nothing, if NumPy isn't installed or
+    the source isn't ASCII (the scanner's Unicode rules are per character).
+    """
+    if np is None or not source.isascii():
+        return None
+    found = _boundaries(source, errors, line)
+
+    def texts(starts, ends):
+        return list(map(source.__getitem__, map(slice, starts.tolist(), ends.tolist())))
+
+    def lines(ends):
+        # A token is on the line its last character is on, which only
+        # differs from the first for strings.
+        return (line + np.searchsorted(found.newlines, ends - 1)).tolist()
+
+    # Tokens are built a kind at a time, with the per-token work in C where
+    # possible, and then put in source order.
+    identifiers = texts(found.identifier_starts, found.identifier_ends)
+    numbers = texts(found.number_starts, found.number_ends)
+    literals = texts(found.string_starts, found.string_ends)
+    operators = texts(found.operator_starts, found.operator_ends)
+    tokens = list(map(Token, map(KEYWORDS_DICT.get, identifiers, repeat(T.IDENTIFIER)),
+                      identifiers, repeat(None), lines(found.identifier_ends)))
+    tokens += map(Token, repeat(T.NUMBER), numbers, map(float, numbers), lines(found.number_ends))
+    tokens += map(Token, repeat(T.STRING), literals, [text[1:-1] for text in literals],
+                  lines(found.string_ends))
+    tokens += map(Token, map(_OPERATORS.__getitem__, operators), operators, repeat(None),
+                  lines(found.operator_ends))
+
+    tokens = list(map(tokens.__getitem__, np.argsort(found.starts()).tolist()))
+    tokens.append(Token(T.EOF, "", None, found.last_line))
+    return tokens
+
+
+def fill(source: str, buffer: TokenBuffer, errors: Error) -> bool:
+    """
+    Records the tokens of `source` in `buffer` like `Scanner.scan_buffer`,
+    without building a `Token` for any of them. Returns False, having done
+    nothing, where `scan` would return None.
+    """
+    if np is None or not source.isascii():
+        return False
+    found = _boundaries(source, errors, 1)
+
+    identifiers = map(source.__getitem__, map(slice, found.identifier_starts.tolist(),
+                                               found.identifier_ends.tolist()))
+    identifier_codes = np.fromiter(
+        map(TYPE_CODES.__getitem__, map(KEYWORDS_DICT.get, identifiers, repeat(T.IDENTIFIER))),
+        dtype=np.uint8, count=len(found.identifier_starts))
+    operator_lengths = found.operator_ends - found.operator_starts
+    operator_codes = _OPERATOR_CODES[
+        found.data[found.operator_starts].astype(np.intp) * 2 + operator_lengths - 1]
+    codes = np.concatenate((
+        identifier_codes,
+        np.full(len(found.number_starts), TYPE_CODES[T.NUMBER], dtype=np.uint8),
+        np.full(len(found.string_starts), TYPE_CODES[T.STRING], dtype=np.uint8),
+        operator_codes))
+    starts = found.starts()
+    ends = np.concatenate((found.identifier_ends, found.number_ends,
+                           found.string_ends, found.operator_ends))
+    order = np.argsort(starts)
+    starts = starts[order]
+    buffer.extend(codes[order].tolist(), starts.tolist(), (ends[order] - starts).tolist())
+    return True
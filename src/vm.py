@@ -0,0 +1,186 @@
+from typing import List
+from bytecode import Chunk, OpCode
+from compiler import Compiler
+from context import RunContext
+from error import LoxRuntimeError
+from interpreter import check_number_operands
+from stmt import Stmt
+from _token import Token
+from utils.equality import is_equal
+from utils.rope import concat, is_string
+from utils.strings import stringify
+from utils.truthy import is_truthy
+
+# Plain ints so the dispatch loop compares against locals, not enum members.
+CONSTANT = int(OpCode.CONSTANT)
+NIL = int(OpCode.NIL)
+TRUE = int(OpCode.TRUE)
+FALSE = int(OpCode.FALSE)
+POP = int(OpCode.POP)
+POP_N = int(OpCode.POP_N)
+GET_LOCAL = int(OpCode.GET_LOCAL)
+SET_LOCAL = int(OpCode.SET_LOCAL)
+GET_GLOBAL = int(OpCode.GET_GLOBAL)
+DEFINE_GLOBAL = int(OpCode.DEFINE_GLOBAL)
+SET_GLOBAL = int(OpCode.SET_GLOBAL)
+EQUAL = int(OpCode.EQUAL)
+NOT_EQUAL = int(OpCode.NOT_EQUAL)
+GREATER = int(OpCode.GREATER)
+GREATER_EQUAL = int(OpCode.GREATER_EQUAL)
+LESS = int(OpCode.LESS)
+LESS_EQUAL = int(OpCode.LESS_EQUAL)
+ADD = int(OpCode.ADD)
+SUBTRACT = int(OpCode.SUBTRACT)
+MULTIPLY = int(OpCode.MULTIPLY)
+DIVIDE = int(OpCode.DIVIDE)
+NOT = int(OpCode.NOT)
+NEGATE = int(OpCode.NEGATE)
+PRINT = int(OpCode.PRINT)
+JUMP = int(OpCode.JUMP)
+JUMP_IF_FALSE = int(OpCode.JUMP_IF_FALSE)
+LOOP = int(OpCode.LOOP)
+
+
+def _undefined(name: Token):
+    return LoxRuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+
+
+class Vm:
+    """
+    Stack-based bytecode engine. Produces the same output and runtime errors
+    as the tree-walking `Interpreter`.
+    """
+
+    def __init__(self, context: RunContext | None = None) -> None:
+        self._context = context if context is not None else RunContext()
+        self._globals = self._context.globals
+        self._output = self._context.output
+
+    def resolve(self, name: Token, depth: int, slot: int):
+        # The Compiler assigns stack slots itself.
+        pass
+
+    def forget_locals(self):
+        pass
+
+    def prepare(self, statements: List[Stmt]) -> Chunk:
+        return Compiler().compile(statements)
+
+    def execute(self, chunk: Chunk):
+        try:
+            self.run(chunk)
+        except LoxRuntimeError as err:
+            self._context.errors.runtime_error(err)
+
+    def interpret(self, statements: List[Stmt]):
+        self.execute(self.prepare(statements))
+
+    def run(self, chunk: Chunk):
+        code = chunk.code
+        constants = chunk.constants
+        tokens = chunk.tokens
+        names = [token.lexeme for token in tokens]
+        global_values = self._globals.values
+        stack: List[object] = []
+        push = stack.append
+        pop = stack.pop
+        write_line = self._output.write_line
+        ip = 0
+        end = len(code)
+
+        # Branches are ordered roughly by how often they run in loops.
+        while ip < end:
+            op = code[ip]
+            ip += 1
+            if op == GET_LOCAL:
+                push(stack[code[ip]])
+                ip += 1
+            elif op == CONSTANT:
+                push(constants[code[ip]])
+                ip += 1
+            elif op == GET_GLOBAL:
+                arg = code[ip]
+                ip += 1
+                try:
+                    push(global_values[names[arg]])
+                except KeyError:
+                    raise _undefined(tokens[arg]) from None
+            elif op == POP:
+                pop()
+            elif op == JUMP_IF_FALSE:
+                if is_truthy(stack[-1]):
+                    ip += 1
+                else:
+                    ip = code[ip]
+            elif op == LOOP or op == JUMP:
+                ip = code[ip]
+            elif op == SET_LOCAL:
+                stack[code[ip]] = stack[-1]
+                ip += 1
+            elif op == SET_GLOBAL:
+                arg = code[ip]
+                ip += 1
+                if names[arg] not in global_values:
+                    raise _undefined(tokens[arg])
+                global_values[names[arg]] = stack[-1]
+            elif op == ADD:
+                right = pop()
+                left = stack[-1]
+                if left.__class__ is float and right.__class__ is float:
+                    stack[-1] = left + right
+                elif is_string(left) and is_string(right):
+                    stack[-1] = concat(left, right)
+                else:
+                    raise LoxRuntimeError(
+                        tokens[code[ip]], "Operands must be two numbers or two strings.")
+                ip += 1
+            # Relies on the comparison and arithmetic opcodes being contiguous.
+            elif GREATER <= op <= LESS_EQUAL or SUBTRACT <= op <= DIVIDE:
+                right = pop()
+                left = stack[-1]
+                if left.__class__ is not float or right.__class__ is not float:
+                    check_number_operands(tokens[code[ip]], left, right)
+                ip += 1
+                if op == LESS:
+                    stack[-1] = left < right
+                elif op == SUBTRACT:
+                    stack[-1] = left - right
+                elif op == GREATER:
+                    stack[-1] = left > right
+                elif op == LESS_EQUAL:
+                    stack[-1] = left <= right
+                elif op == GREATER_EQUAL:
+                    stack[-1] = left >= right
+                elif op == MULTIPLY:
+                    stack[-1] = left * right
+                else:
+                    stack[-1] = left / right
+            elif op == EQUAL:
+                right = pop()
+                stack[-1] = is_equal(stack[-1], right)
+            elif op == NOT_EQUAL:
+                right = pop()
+                stack[-1] = not is_equal(stack[-1], right)
+            elif op == POP_N:
+                del stack[-code[ip]:]
+                ip += 1
+            elif op == PRINT:
+                write_line(stringify(pop()))
+            elif op == DEFINE_GLOBAL:
+                global_values[names[code[ip]]] = pop()
+                ip += 1
+            elif op == NIL:
+                push(None)
+            elif op == TRUE:
+                push(True)
+            elif op == FALSE:
+                push(False)
+            elif op == NOT:
+                stack[-1] = not is_truthy(stack[-1])
+            elif op == NEGATE:
+                if stack[-1].__class__ is not float:
+                    check_number_operands(tokens[code[ip]], stack[-1])
+                stack[-1] = -stack[-1]
+                ip += 1
+            else:
+                raise RuntimeError(f"Unknown opcode {op}")
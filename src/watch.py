@@ -0,0 +1,52 @@
+import argparse
+import os
+import sys
+import time
+from incremental import IncrementalParser
+from output import stdout_sink
+
+# Seconds between checks of the watched file.
+POLL_INTERVAL = 0.05
+
+
+def _stamp(path: str):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def watch(path: str, args: argparse.Namespace, out=sys.stderr) -> None:
+    """
+    Runs `path` and then runs it again every time it is saved, until
+    interrupted. Each run starts from fresh globals, but only the top-level
+    declarations an edit touched are scanned and parsed again. A line per
+    run on `out` says how much was re-parsed and how long the run took.
+    """
+    # Imported here: plox imports this module to dispatch --watch.
+    from plox import Plox
+
+    parser = IncrementalParser()
+    seen = None
+    while True:
+        stamp = _stamp(path)
+        if stamp is not None and stamp != seen:
+            seen = stamp
+            try:
+                with open(path) as file:
+                    source = file.read()
+            except OSError as err:
+                out.write(f"[watch] {err}\n")
+                continue
+            plox = Plox(args)
+            start = time.perf_counter()
+            count = plox.run_incremental(source, parser)
+            stdout_sink.flush()
+            elapsed = (time.perf_counter() - start) * 1000
+            if plox.profiler is not None:
+                plox.profiler.report()
+            out.write(f"[watch] {path}: re-parsed {parser.reparsed} of {count} declarations, "
+                      f"ran in {elapsed:.1f} ms\n")
+            out.flush()
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,55 @@
+"""
+Reports memory per AST node for the dataclass tree and the `AstArena`.
+
+Tokens are scanned up front and shared by both representations, so they
+are not counted against either.
+
+Usage: python tools/arena_memory.py [script]
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from arena import ArenaBuilder  # noqa: E402
+from parser import Parser  # noqa: E402
+from scanner import Scanner  # noqa: E402
+
+SAMPLE = """
+var total = 0;
+for (var i = 0; i < 10; i = i + 1) {
+    var x = (i * 2 + 1) / 3;
+    if (x > 2 and !(x == 5)) total = total + x; else print "small" + "!";
+}
+"""
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as file:
+            source = file.read()
+    else:
+        source = SAMPLE * 2000
+
+    tokens = Scanner(source).scan_tokens()
+
+    tracemalloc.start()
+    statements = Parser(tokens).parse()
+    tree_bytes = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    arena = ArenaBuilder().build(statements)
+    arena_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = len(arena)
+    print(f"nodes            {nodes}")
+    print(f"dataclass tree   {tree_bytes / nodes:6.1f} bytes/node")
+    print(f"arena (total)    {arena_bytes / nodes:6.1f} bytes/node")
+    print(f"arena (arrays)   {arena.nbytes() / nodes:6.1f} bytes/node")
+
+
+if __name__ == "__main__":
+    main()
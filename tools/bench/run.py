@@ -0,0 +1,170 @@
+"""
+Times each phase of the plox pipeline (scan, parse, resolve, optimize,
+interpret) on the workloads in `workloads.py`, over repeated runs.
+
+Results are printed as a table and can be written as JSON. Given a baseline
+written by an earlier run, each phase's median is compared against it and
+the exit status is 1 if any phase got slower than the threshold allows.
+
+Usage: python tools/bench [--repeat N] [--engine NAME] [--workload NAME ...]
+                          [--output FILE] [--baseline FILE] [--threshold F]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from optimizer import Optimizer  # noqa: E402
+from output import stdout_sink  # noqa: E402
+from parser import Parser  # noqa: E402
+from plox import ENGINES  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import Scanner  # noqa: E402
+from version import VERSION  # noqa: E402
+from workloads import WORKLOADS  # noqa: E402
+
+PHASES = ["scan", "parse", "resolve", "optimize", "interpret"]
+
+
+def _run_once(engine_name: str, source: str, optimize: bool) -> dict:
+    timings = {}
+    engine = ENGINES[engine_name]()
+
+    start = time.perf_counter()
+    tokens = Scanner(source).scan_tokens()
+    timings["scan"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    statements = Parser(tokens).parse()
+    timings["parse"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    Resolver(engine).resolve(statements)
+    timings["resolve"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if optimize:
+        statements = Optimizer().optimize(statements)
+    timings["optimize"] = time.perf_counter() - start
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.interpret(statements)
+        stdout_sink.flush()
+        timings["interpret"] = time.perf_counter() - start
+
+    timings["total"] = sum(timings.values())
+    return timings
+
+
+def _statistics(samples: list) -> dict:
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "max": max(samples),
+    }
+
+
+def run_workload(engine_name: str, source: str, repeat: int, optimize: bool) -> dict:
+    # One untimed run so imports and caches are warm.
+    _run_once(engine_name, source, optimize)
+    runs = [_run_once(engine_name, source, optimize) for _ in range(repeat)]
+    return {phase: _statistics([run[phase] for run in runs])
+            for phase in PHASES + ["total"]}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Returns (workload, phase, baseline median, median) for each regression."""
+    regressions = []
+    for workload, phases in results["workloads"].items():
+        old_phases = baseline.get("workloads", {}).get(workload)
+        if old_phases is None:
+            continue
+        for phase, stats in phases.items():
+            old = old_phases.get(phase)
+            if old is None:
+                continue
+            # Ignore noise on phases too short to measure meaningfully.
+            if stats["median"] > old["median"] * (1 + threshold) and \
+                    stats["median"] - old["median"] > 0.001:
+                regressions.append((workload, phase, old["median"], stats["median"]))
+    return regressions
+
+
+def _print_table(results: dict, baseline: dict | None):
+    columns = PHASES + ["total"]
+    print(f"{'workload (median ms)':<24}" + "".join(f"{phase:>11}" for phase in columns))
+    for workload, phases in results["workloads"].items():
+        print(f"{workload:<24}" + "".join(
+            f"{phases[phase]['median'] * 1000:>11.2f}" for phase in columns))
+        old_phases = (baseline or {}).get("workloads", {}).get(workload)
+        if old_phases:
+            changes = []
+            for phase in columns:
+                old = old_phases.get(phase, {}).get("median")
+                if old:
+                    changes.append(f"{(phases[phase]['median'] / old - 1) * 100:>+10.1f}%")
+                else:
+                    changes.append(f"{'-':>11}")
+            print(f"{'  vs baseline':<24}" + "".join(changes))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(prog="bench")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--engine", choices=ENGINES, default="tree")
+    arg_parser.add_argument("--workload", action="append", choices=WORKLOADS,
+                            help="workload to run (repeatable; default: all)")
+    arg_parser.add_argument("--no-optimize", dest="optimize", action="store_false")
+    arg_parser.add_argument("--output", help="write the results as JSON to this file")
+    arg_parser.add_argument("--baseline", help="JSON results to compare against")
+    arg_parser.add_argument("--threshold", type=float, default=0.10,
+                            help="allowed slowdown of a phase's median (default: 0.10)")
+    args = arg_parser.parse_args()
+
+    # Deep nesting and long chains recurse through the parser and engines.
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    results = {
+        "plox_version": VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "engine": args.engine,
+        "optimize": args.optimize,
+        "repeat": args.repeat,
+        "workloads": {},
+    }
+    for name in args.workload or WORKLOADS:
+        source = WORKLOADS[name]()
+        results["workloads"][name] = run_workload(args.engine, source, args.repeat, args.optimize)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    _print_table(results, baseline)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for workload, phase, old, new in regressions:
+            print(f"REGRESSION {workload} {phase}: "
+                  f"{old * 1000:.2f}ms -> {new * 1000:.2f}ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Lox programs for the benchmark suite, each small enough to run in well
+under a second on the tree-walker but large enough to time reliably.
+"""
+
+
+def _loops() -> str:
+    return """
+        var total = 0;
+        for (var i = 0; i < 20000; i = i + 1) {
+            var x = i * 2;
+            total = total + x - i;
+        }
+        var n = 0;
+        while (n < 20000) n = n + 1;
+        print total + n;
+    """
+
+
+def _deep_nesting(depth: int = 60, iterations: int = 300) -> str:
+    opening = "".join(f"{{ var v{level} = {level}; " for level in range(depth))
+    closing = "}" * depth
+    return f"""
+        var total = 0;
+        for (var i = 0; i < {iterations}; i = i + 1) {{
+            {opening} total = total + v0 + v{depth - 1}; {closing}
+        }}
+        print total;
+    """
+
+
+def _string_concatenation() -> str:
+    return """
+        var s = "";
+        for (var i = 0; i < 5000; i = i + 1) {
+            s = s + "ab";
+            if (i == 2500) s = s + "-middle-";
+        }
+        var t = "";
+        for (var j = 0; j < 2000; j = j + 1) t = "x" + t + "y";
+        print s == t;
+    """
+
+
+def _flat_script(statements: int = 20000) -> str:
+    lines = ["var acc = 0;"]
+    for i in range(statements):
+        match i % 4:
+            case 0:
+                lines.append(f"var g{i} = {i} * 2 + 1;")
+            case 1:
+                lines.append(f"acc = acc + g{i - 1};")
+            case 2:
+                lines.append(f'if (acc > {i}) acc = acc - 1; else acc = acc + 1;')
+            case 3:
+                lines.append(f'// line {i}\n{{ var local = "s{i}"; }}')
+    lines.append("print acc;")
+    return "\n".join(lines)
+
+
+def _expression_chains(terms: int = 200, chains: int = 100) -> str:
+    operators = ["+", "-", "*", "/"]
+    arithmetic = " ".join(f"{i + 1} {operators[i % 4]}" for i in range(terms)) + " 1"
+    comparisons = " and ".join(f"(x > -{i} or x == {i})" for i in range(terms // 4))
+    lines = ["var x = 1;", "var y = 0;"]
+    for i in range(chains):
+        lines.append(f"y = x + {arithmetic};")
+        lines.append(f"if ({comparisons}) x = x + 1;")
+    lines.append("print x;")
+    return "\n".join(lines)
+
+
+WORKLOADS = {
+    "loops": _loops,
+    "deep_nesting": _deep_nesting,
+    "string_concatenation": _string_concatenation,
+    "flat_script": _flat_script,
+    "expression_chains": _expression_chains,
+}
@@ -0,0 +1,80 @@
+"""
+Compares execution time of the plox engines on a few small workloads.
+
+Usage: python tools/bench_engines.py [repeat]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from output import stdout_sink  # noqa: E402
+from plox import ENGINES  # noqa: E402
+from parser import Parser  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import Scanner  # noqa: E402
+
+WORKLOADS = {
+    "for loop": """
+        var total = 0;
+        for (var i = 0; i < 100000; i = i + 1) {
+            var x = i * 2;
+            total = total + x - i;
+        }
+        print total;
+    """,
+    "nested blocks": """
+        var i = 0;
+        while (i < 20000) {
+            var a = i;
+            { var b = a + 1; { var c = b + 1; { var d = c + a; i = i + 1; } } }
+        }
+        print i;
+    """,
+    "globals": """
+        var a = 0;
+        var b = 1;
+        var n = 0;
+        while (n < 50000) {
+            var t = a + b;
+            a = b;
+            b = t;
+            n = n + 1;
+            if (b > 1000000) { a = 0; b = 1; }
+        }
+        print a;
+    """,
+    "strings": """
+        var s = "";
+        for (var i = 0; i < 20000; i = i + 1) s = s + "x";
+        print s == s;
+    """,
+}
+
+
+def _run(engine_class, source: str) -> float:
+    engine = engine_class()
+    statements = Parser(Scanner(source).scan_tokens()).parse()
+    Resolver(engine).resolve(statements)
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        engine.interpret(statements)
+        stdout_sink.flush()
+        return time.perf_counter() - start
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    names = list(ENGINES)
+    print(f"{'workload':<16}" + "".join(f"{name:>12}" for name in names))
+    for workload, source in WORKLOADS.items():
+        timings = [min(_run(ENGINES[name], source) for _ in range(repeat))
+                   for name in names]
+        print(f"{workload:<16}" + "".join(f"{t * 1000:>10.1f}ms" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
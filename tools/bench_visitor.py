@@ -0,0 +1,81 @@
+"""
+Measures the per-node cost of visitor dispatch, comparing the old
+string-keyed `@visitor` decorator with the generated `visit_*` methods.
+
+Usage: python tools/bench_visitor.py [nodes]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from expr import Binary, Literal  # noqa: E402
+from _token import Token  # noqa: E402
+from token_type import TokenType  # noqa: E402
+
+# The previous dispatch mechanism, kept here only for comparison.
+_methods = {}
+
+
+def _qualname(obj):
+    return obj.__module__ + '.' + obj.__qualname__
+
+
+def _visitor_impl(self, arg):
+    method = _methods[(_qualname(type(self)), type(arg))]
+    return method(self, arg)
+
+
+def visitor(arg_type):
+    def decorator(fn):
+        name = _qualname(fn)
+        _methods[(name[:name.rfind('.')], arg_type)] = fn
+        return _visitor_impl
+    return decorator
+
+
+class LegacyVisitor:
+    @visitor(Literal)
+    def visit(self, expr: Literal):
+        return expr.value
+
+    @visitor(Binary)
+    def visit(self, expr: Binary):
+        return self.visit(expr.left) + self.visit(expr.right)
+
+
+class DirectVisitor:
+    def visit_literal_expr(self, expr: Literal):
+        return expr.value
+
+    def visit_binary_expr(self, expr: Binary):
+        return expr.left.accept(self) + expr.right.accept(self)
+
+
+def _chain(nodes: int):
+    plus = Token(TokenType.PLUS, "+", None, 1)
+    expr = Literal(1.0)
+    for _ in range(nodes // 2):
+        expr = Binary(expr, plus, Literal(1.0))
+    return expr
+
+
+def main():
+    nodes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    expr = _chain(nodes)
+    total = 2 * (nodes // 2) + 1
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 4 * nodes))
+
+    legacy = LegacyVisitor()
+    direct = DirectVisitor()
+    assert legacy.visit(expr) == expr.accept(direct)
+
+    for name, run in (("@visitor", lambda: legacy.visit(expr)),
+                      ("visit_*", lambda: expr.accept(direct))):
+        best = min(timeit.repeat(run, number=20, repeat=5)) / 20
+        print(f"{name:<10} {best / total * 1e9:8.1f} ns/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Runs a set of Lox programs on every engine, with and without the optimizer,
+and checks that each run prints exactly what the tree-walker prints, with the
+same error state and no warnings or Python exceptions of its own.
+
+Every program here once made some engine disagree with the tree-walker.
+
+Usage: python tools/check_engines.py
+"""
+import io
+import os
+import sys
+import traceback
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from context import RunContext  # noqa: E402
+from optimizer import Optimizer  # noqa: E402
+from output import OutputSink  # noqa: E402
+from parser import Parser  # noqa: E402
+from plox import ENGINES  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import Scanner  # noqa: E402
+
+PROGRAMS = {
+    # The optimizer folds `-4` into a negative literal operand.
+    "negative literal operand": """
+        var x = 1;
+        print -4 - x;
+        print -4 < x;
+        print x * -2.5;
+        print -0 + x;
+    """,
+    # Conditions on literals must not make CPython warn about `is`.
+    "literal conditions": """
+        if ("") print 1;
+        if (0) print 2;
+        if (nil) print 3; else print 4;
+        while (false) print 5;
+        print !"";
+        print !nil;
+        print nil or "default";
+    """,
+}
+
+
+def run(source: str, engine_name: str, optimize: bool):
+    """Output, error state and any warnings or exception of one run of `source`."""
+    stream = io.StringIO()
+    context = RunContext(OutputSink(stream=stream))
+    engine = ENGINES[engine_name](context)
+    crash = None
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        try:
+            statements = Parser(Scanner(source, context.errors).scan_tokens(),
+                                context.errors).parse()
+            if not context.errors.had_error:
+                Resolver(engine, context.errors).resolve(statements)
+            if not context.errors.had_error:
+                if optimize:
+                    statements = Optimizer().optimize(statements)
+                engine.interpret(statements)
+        except Exception:
+            crash = traceback.format_exc(limit=1)
+    context.output.flush()
+    return (stream.getvalue(), context.errors.had_error,
+            context.errors.had_runtime_error, [str(w.message) for w in caught], crash)
+
+
+def main():
+    failures = 0
+    runs = 0
+    for name, source in PROGRAMS.items():
+        for optimize in (True, False):
+            expected = run(source, "tree", optimize)
+            for engine_name in ENGINES:
+                runs += 1
+                got = run(source, engine_name, optimize)
+                if got != expected:
+                    failures += 1
+                    mode = "optimized" if optimize else "unoptimized"
+                    print(f"{name} on {engine_name} ({mode}): "
+                          f"expected {expected!r}, got {got!r}")
+    print(f"{runs} runs: {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -32,12 +32,13 @@ def define_ast(output_dir: str, base_name: str, types: List[str]):
         # The AST classes
         for type in types:
             class_name, fields = type.split(':')
-            define_type(file, base_class_name,
-                        class_name.strip(), fields.strip())
+            class_name = class_name.strip()
+            define_type(file, base_class_name, class_name, fields.strip())
 
+            # Dispatch straight to the visitor's method for this node type.
             file.writelines([
                 f"\n{INDENT}def accept(self, visitor):\n",
-                f"{INDENT}{INDENT}return visitor.visit(self)\n"
+                f"{INDENT}{INDENT}return visitor.visit_{class_name.lower()}_{base_name.lower()}(self)\n"
             ])
 
 
@@ -0,0 +1,98 @@
+"""
+Runs hundreds of Lox scripts at once on a thread pool, each with its own
+`RunContext`, and checks that every run printed exactly what it prints when
+run alone, with the same error state. All scripts use the same global names,
+so state leaking between runs shows up as wrong output.
+
+Usage: python tools/stress_threads.py [scripts] [threads]
+"""
+import io
+import os
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from context import RunContext  # noqa: E402
+from optimizer import Optimizer  # noqa: E402
+from output import OutputSink  # noqa: E402
+from parser import Parser  # noqa: E402
+from plox import ENGINES  # noqa: E402
+from resolver import Resolver  # noqa: E402
+from scanner import Scanner  # noqa: E402
+
+
+def _script(seed: int) -> str:
+    match seed % 5:
+        case 0:
+            return f"""
+                var total = 0;
+                for (var i = 0; i < {200 + seed}; i = i + 1) total = total + i * {seed};
+                print total;
+            """
+        case 1:
+            return f"""
+                var total = "";
+                for (var i = 0; i < {seed % 40 + 200}; i = i + 1) total = total + "{seed % 10}";
+                print total;
+            """
+        case 2:
+            return f"""
+                var total = {seed};
+                {{ var doubled = total * 2; {{ var shadow = doubled + 1; print shadow; }} }}
+                print total;
+                print total + "oops";
+                print "unreachable";
+            """
+        case 3:
+            return f"""
+                var total = {seed};
+                print total;
+                var broken = total print broken;
+            """
+    return f"""
+        var total = {seed};
+        while (total > 0) {{ if (total == {seed // 2}) print total; total = total - 1; }}
+        print missing{seed};
+    """
+
+
+def run(source: str, engine_name: str):
+    """Output, had_error and had_runtime_error of one run of `source`."""
+    stream = io.StringIO()
+    context = RunContext(OutputSink(stream=stream))
+    engine = ENGINES[engine_name](context)
+    statements = Parser(Scanner(source, context.errors).scan_tokens(), context.errors).parse()
+    if not context.errors.had_error:
+        Resolver(engine, context.errors).resolve(statements)
+    if not context.errors.had_error:
+        engine.interpret(Optimizer().optimize(statements))
+    context.output.flush()
+    return stream.getvalue(), context.errors.had_error, context.errors.had_runtime_error
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    # Switch threads as often as possible to shake out races.
+    sys.setswitchinterval(1e-6)
+
+    random.seed(0)
+    jobs = [(_script(seed), random.choice(list(ENGINES))) for seed in range(count)]
+    expected = [run(source, "tree") for source, _ in jobs]
+
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(lambda job: run(*job), jobs))
+
+    failures = 0
+    for seed, ((_, engine), want, got) in enumerate(zip(jobs, expected, results)):
+        if want != got:
+            failures += 1
+            print(f"script {seed} on {engine}: expected {want!r}, got {got!r}")
+    print(f"{count} scripts on {threads} threads: {failures} failures")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()